@@ -122,6 +122,8 @@ def build_parser():
                         help='tsv file path for the development set for the 2nd auxiliary task')
     parser.add_argument('--eval_sets', type=str, default=[], nargs='+',
                         help='tsv file paths for the evaluation sets')
+    parser.add_argument('--cache_dev_features', type=strtobool, default=False,
+                        help='keep input features of the development/evaluation sets in memory after the first epoch')
     parser.add_argument('--nlsyms', type=str, default=False, nargs='?',
                         help='non-linguistic symbols file path')
     parser.add_argument('--dict', type=str,
@@ -181,6 +183,9 @@ def build_parser():
                         help='number of encoder RNN layers in the 1st auxiliary task')
     parser.add_argument('--enc_n_layers_sub2', type=int, default=0,
                         help='number of encoder RNN layers in the 2nd auxiliary task')
+    parser.add_argument('--enc_amp_dtype', type=str, default=None, nargs='?',
+                        choices=['float16', 'bfloat16'],
+                        help='run the encoder in mixed precision (bfloat16 is recommended since float16 is not loss-scaled)')
     parser.add_argument('--subsample', type=str, default="1_1_1_1_1",
                         help='delimited list input')
     parser.add_argument('--subsample_type', type=str, default='drop',
@@ -376,6 +381,13 @@ def build_parser():
                         help='recognize by teacher-forcing')
     parser.add_argument('--recog_batch_size', type=int, default=1,
                         help='size of mini-batch in evaluation')
+    parser.add_argument('--recog_n_workers', type=int, default=1,
+                        help='number of evaluation sets decoded concurrently on separate CUDA streams, '
+                        'or number of processes rendering figures in the plotting scripts')
+    parser.add_argument('--recog_quantize', type=strtobool, default=False,
+                        help='quantize weights of linear and encoder RNN layers into int8 (CPU decoding only)')
+    parser.add_argument('--recog_amp', type=strtobool, default=False,
+                        help='decode with bf16/fp16 autocast (GPU decoding only)')
     parser.add_argument('--recog_beam_width', type=int, default=1,
                         help='size of beam')
     parser.add_argument('--recog_max_len_ratio', type=float, default=1.0,
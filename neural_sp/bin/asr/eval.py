@@ -7,11 +7,13 @@
 """Evaluate the ASR model."""
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import copy
 import logging
 import os
 import sys
 import time
+import torch
 
 from neural_sp.bin.args_asr import parse_args_eval
 from neural_sp.bin.eval_utils import average_checkpoints
@@ -28,10 +30,98 @@ from neural_sp.evaluators.wordpiece import eval_wordpiece
 from neural_sp.evaluators.wordpiece_bleu import eval_wordpiece_bleu
 from neural_sp.models.lm.build import build_lm
 from neural_sp.models.seq2seq.speech2text import Speech2Text
+from neural_sp.utils import mkdir_join
 
 logger = logging.getLogger(__name__)
 
 
+def evaluate(models, dataset, recog_params, args, epoch, recog_dir):
+    """Evaluate a single set.
+
+    Args:
+        models (list): models to evaluate
+        dataset (Dataset): evaluation dataset
+        recog_params (dict):
+        args (Namespace):
+        epoch (int):
+        recog_dir (str): directory to save decoding results
+    Returns:
+        metrics (dict): evaluation results of the set
+
+    """
+    start_time = time.time()
+
+    metrics = {}
+    if args.recog_metric == 'edit_distance':
+        if args.recog_unit in ['word', 'word_char']:
+            metrics['wer'], metrics['cer'], _ = eval_word(models, dataset, recog_params,
+                                                          epoch=epoch - 1,
+                                                          recog_dir=recog_dir,
+                                                          progressbar=True)
+        elif args.recog_unit == 'wp':
+            metrics['wer'], metrics['cer'] = eval_wordpiece(models, dataset, recog_params,
+                                                            epoch=epoch - 1,
+                                                            recog_dir=recog_dir,
+                                                            streaming=args.recog_streaming,
+                                                            progressbar=True,
+                                                            fine_grained=True)
+        elif 'char' in args.recog_unit:
+            metrics['wer'], metrics['cer'] = eval_char(models, dataset, recog_params,
+                                                       epoch=epoch - 1,
+                                                       recog_dir=recog_dir,
+                                                       progressbar=True,
+                                                       task_idx=0)
+            #  task_idx=1 if args.recog_unit and 'char' in args.recog_unit else 0)
+        elif 'phone' in args.recog_unit:
+            metrics['per'] = eval_phone(models, dataset, recog_params,
+                                        epoch=epoch - 1,
+                                        recog_dir=recog_dir,
+                                        progressbar=True)
+        else:
+            raise ValueError(args.recog_unit)
+    elif args.recog_metric in ['ppl', 'loss']:
+        metrics['ppl'], metrics['loss'] = eval_ppl(models, dataset, progressbar=True)
+    elif args.recog_metric == 'accuracy':
+        metrics['acc'] = eval_accuracy(models, dataset, progressbar=True)
+    elif args.recog_metric == 'bleu':
+        metrics['bleu'] = eval_wordpiece_bleu(models, dataset, recog_params,
+                                              epoch=epoch - 1,
+                                              recog_dir=recog_dir,
+                                              streaming=args.recog_streaming,
+                                              progressbar=True,
+                                              fine_grained=True)
+    else:
+        raise NotImplementedError(args.recog_metric)
+    elasped_time = time.time() - start_time
+    logger.info('Elasped time (%s): %.3f [sec]' % (dataset.set, elasped_time))
+    logger.info('RTF (%s): %.3f' % (dataset.set, elasped_time / (dataset.n_frames * 0.01)))
+    return metrics
+
+
+def evaluate_on_stream(models, datasets, recog_dirs, recog_params, args, epoch):
+    """Evaluate sets sequentially on a dedicated CUDA stream.
+
+    Args:
+        models (list): models to evaluate
+        datasets (list): evaluation datasets
+        recog_dirs (list): directories to save decoding results of each set
+        recog_params (dict):
+        args (Namespace):
+        epoch (int):
+    Returns:
+        metrics (list): evaluation results of each set
+
+    """
+    stream = torch.cuda.Stream()
+    metrics = []
+    with torch.cuda.stream(stream):
+        for dataset, recog_dir in zip(datasets, recog_dirs):
+            metrics += [evaluate(models, dataset, recog_params, args, epoch,
+                                 recog_dir=recog_dir)]
+    stream.synchronize()
+    return metrics
+
+
 def main():
 
     # Load configuration
@@ -42,11 +132,14 @@ def main():
         os.remove(os.path.join(args.recog_dir, 'decode.log'))
     set_logger(os.path.join(args.recog_dir, 'decode.log'), stdout=args.recog_stdout)
 
-    wer_avg, cer_avg, per_avg = 0, 0, 0
-    ppl_avg, loss_avg = 0, 0
-    acc_avg = 0
-    bleu_avg = 0
-    for i, s in enumerate(args.recog_sets):
+    # Sort utterances by length for batch decoding to minimize padding
+    # NOTE: keep the original order when carrying over states between utterances
+    sort_by = 'utt_id'
+    if args.recog_batch_size > 1 and not (args.recog_asr_state_carry_over or args.recog_lm_state_carry_over):
+        sort_by = 'input'
+
+    datasets = []
+    for s in args.recog_sets:
         # Load dataset
         dataset = Dataset(corpus=args.corpus,
                           tsv_path=s,
@@ -63,167 +156,154 @@ def main():
                           unit_sub1=args.unit_sub1,
                           unit_sub2=args.unit_sub2,
                           batch_size=args.recog_batch_size,
+                          sort_by=sort_by,
                           first_n_utterances=args.recog_first_n_utt,
                           is_test=True)
+        datasets.append(dataset)
 
-        if i == 0:
-            # Load the ASR model
-            model = Speech2Text(args, dir_name)
-            epoch = int(args.recog_model[0].split('-')[-1])
-            if args.recog_n_average > 1:
-                # Model averaging for Transformer
-                # topk_list = load_checkpoint(args.recog_model[0], model)
-                model = average_checkpoints(model, args.recog_model[0],
-                                            # topk_list=topk_list,
-                                            n_average=args.recog_n_average)
-            else:
-                load_checkpoint(args.recog_model[0], model)
-
-            # Ensemble (different models)
-            ensemble_models = [model]
-            if len(args.recog_model) > 1:
-                for recog_model_e in args.recog_model[1:]:
-                    conf_e = load_config(os.path.join(os.path.dirname(recog_model_e), 'conf.yml'))
-                    args_e = copy.deepcopy(args)
-                    for k, v in conf_e.items():
-                        if 'recog' not in k:
-                            setattr(args_e, k, v)
-                    model_e = Speech2Text(args_e)
-                    load_checkpoint(recog_model_e, model_e)
-                    if args.recog_n_gpus >= 1:
-                        model_e.cuda()
-                    ensemble_models += [model_e]
-
-            # Load the LM for shallow fusion
-            if not args.lm_fusion:
-                # first path
-                if args.recog_lm is not None and args.recog_lm_weight > 0:
-                    conf_lm = load_config(os.path.join(os.path.dirname(args.recog_lm), 'conf.yml'))
-                    args_lm = argparse.Namespace()
-                    for k, v in conf_lm.items():
-                        setattr(args_lm, k, v)
-                    args_lm.recog_mem_len = args.recog_mem_len
-                    lm = build_lm(args_lm, wordlm=args.recog_wordlm,
-                                  lm_dict_path=os.path.join(os.path.dirname(args.recog_lm), 'dict.txt'),
-                                  asr_dict_path=os.path.join(dir_name, 'dict.txt'))
-                    load_checkpoint(args.recog_lm, lm)
-                    if args_lm.backward:
-                        model.lm_bwd = lm
-                    else:
-                        model.lm_fwd = lm
-
-                # second path (forward)
-                if args.recog_lm_second is not None and args.recog_lm_second_weight > 0:
-                    conf_lm_second = load_config(os.path.join(os.path.dirname(args.recog_lm_second), 'conf.yml'))
-                    args_lm_second = argparse.Namespace()
-                    for k, v in conf_lm_second.items():
-                        setattr(args_lm_second, k, v)
-                    args_lm_second.recog_mem_len = args.recog_mem_len
-                    lm_second = build_lm(args_lm_second)
-                    load_checkpoint(args.recog_lm_second, lm_second)
-                    model.lm_second = lm_second
-
-                # second path (bakward)
-                if args.recog_lm_bwd is not None and args.recog_lm_bwd_weight > 0:
-                    conf_lm = load_config(os.path.join(os.path.dirname(args.recog_lm_bwd), 'conf.yml'))
-                    args_lm_bwd = argparse.Namespace()
-                    for k, v in conf_lm.items():
-                        setattr(args_lm_bwd, k, v)
-                    args_lm_bwd.recog_mem_len = args.recog_mem_len
-                    lm_bwd = build_lm(args_lm_bwd)
-                    load_checkpoint(args.recog_lm_bwd, lm_bwd)
-                    model.lm_bwd = lm_bwd
-
-            if not args.recog_unit:
-                args.recog_unit = args.unit
-
-            logger.info('recog unit: %s' % args.recog_unit)
-            logger.info('recog metric: %s' % args.recog_metric)
-            logger.info('recog oracle: %s' % args.recog_oracle)
-            logger.info('epoch: %d' % epoch)
-            logger.info('batch size: %d' % args.recog_batch_size)
-            logger.info('beam width: %d' % args.recog_beam_width)
-            logger.info('min length ratio: %.3f' % args.recog_min_len_ratio)
-            logger.info('max length ratio: %.3f' % args.recog_max_len_ratio)
-            logger.info('length penalty: %.3f' % args.recog_length_penalty)
-            logger.info('length norm: %s' % args.recog_length_norm)
-            logger.info('coverage penalty: %.3f' % args.recog_coverage_penalty)
-            logger.info('coverage threshold: %.3f' % args.recog_coverage_threshold)
-            logger.info('CTC weight: %.3f' % args.recog_ctc_weight)
-            logger.info('fist LM path: %s' % args.recog_lm)
-            logger.info('second LM path: %s' % args.recog_lm_second)
-            logger.info('backward LM path: %s' % args.recog_lm_bwd)
-            logger.info('LM weight (first-pass): %.3f' % args.recog_lm_weight)
-            logger.info('LM weight (second-pass): %.3f' % args.recog_lm_second_weight)
-            logger.info('LM weight (backward): %.3f' % args.recog_lm_bwd_weight)
-            logger.info('GNMT: %s' % args.recog_gnmt_decoding)
-            logger.info('forward-backward attention: %s' % args.recog_fwd_bwd_attention)
-            logger.info('resolving UNK: %s' % args.recog_resolving_unk)
-            logger.info('ensemble: %d' % (len(ensemble_models)))
-            logger.info('ASR decoder state carry over: %s' % (args.recog_asr_state_carry_over))
-            logger.info('LM state carry over: %s' % (args.recog_lm_state_carry_over))
-            logger.info('model average (Transformer): %d' % (args.recog_n_average))
-
-            # GPU setting
-            if args.recog_n_gpus >= 1:
-                model.cudnn_setting(deterministic=True, benchmark=False)
-                model.cuda()
+    # Load the ASR model
+    model = Speech2Text(args, dir_name)
+    epoch = int(args.recog_model[0].split('-')[-1])
+    if args.recog_n_average > 1:
+        # Model averaging for Transformer
+        # topk_list = load_checkpoint(args.recog_model[0], model)
+        model = average_checkpoints(model, args.recog_model[0],
+                                    # topk_list=topk_list,
+                                    n_average=args.recog_n_average)
+    else:
+        load_checkpoint(args.recog_model[0], model)
 
-        start_time = time.time()
+    # Ensemble (different models)
+    ensemble_models = [model]
+    if len(args.recog_model) > 1:
+        for recog_model_e in args.recog_model[1:]:
+            conf_e = load_config(os.path.join(os.path.dirname(recog_model_e), 'conf.yml'))
+            args_e = copy.deepcopy(args)
+            for k, v in conf_e.items():
+                if 'recog' not in k:
+                    setattr(args_e, k, v)
+            model_e = Speech2Text(args_e)
+            load_checkpoint(recog_model_e, model_e)
+            if args.recog_n_gpus >= 1:
+                model_e.cuda()
+            ensemble_models += [model_e]
 
-        if args.recog_metric == 'edit_distance':
-            if args.recog_unit in ['word', 'word_char']:
-                wer, cer, _ = eval_word(ensemble_models, dataset, recog_params,
-                                        epoch=epoch - 1,
-                                        recog_dir=args.recog_dir,
-                                        progressbar=True)
-                wer_avg += wer
-                cer_avg += cer
-            elif args.recog_unit == 'wp':
-                wer, cer = eval_wordpiece(ensemble_models, dataset, recog_params,
-                                          epoch=epoch - 1,
-                                          recog_dir=args.recog_dir,
-                                          streaming=args.recog_streaming,
-                                          progressbar=True,
-                                          fine_grained=True)
-                wer_avg += wer
-                cer_avg += cer
-            elif 'char' in args.recog_unit:
-                wer, cer = eval_char(ensemble_models, dataset, recog_params,
-                                     epoch=epoch - 1,
-                                     recog_dir=args.recog_dir,
-                                     progressbar=True,
-                                     task_idx=0)
-                #  task_idx=1 if args.recog_unit and 'char' in args.recog_unit else 0)
-                wer_avg += wer
-                cer_avg += cer
-            elif 'phone' in args.recog_unit:
-                per = eval_phone(ensemble_models, dataset, recog_params,
-                                 epoch=epoch - 1,
-                                 recog_dir=args.recog_dir,
-                                 progressbar=True)
-                per_avg += per
+    # Load the LM for shallow fusion
+    if not args.lm_fusion:
+        # first path
+        if args.recog_lm is not None and args.recog_lm_weight > 0:
+            conf_lm = load_config(os.path.join(os.path.dirname(args.recog_lm), 'conf.yml'))
+            args_lm = argparse.Namespace()
+            for k, v in conf_lm.items():
+                setattr(args_lm, k, v)
+            args_lm.recog_mem_len = args.recog_mem_len
+            lm = build_lm(args_lm, wordlm=args.recog_wordlm,
+                          lm_dict_path=os.path.join(os.path.dirname(args.recog_lm), 'dict.txt'),
+                          asr_dict_path=os.path.join(dir_name, 'dict.txt'))
+            load_checkpoint(args.recog_lm, lm)
+            if args_lm.backward:
+                model.lm_bwd = lm
             else:
-                raise ValueError(args.recog_unit)
-        elif args.recog_metric in ['ppl', 'loss']:
-            ppl, loss = eval_ppl(ensemble_models, dataset, progressbar=True)
-            ppl_avg += ppl
-            loss_avg += loss
-        elif args.recog_metric == 'accuracy':
-            acc_avg += eval_accuracy(ensemble_models, dataset, progressbar=True)
-        elif args.recog_metric == 'bleu':
-            bleu = eval_wordpiece_bleu(ensemble_models, dataset, recog_params,
-                                       epoch=epoch - 1,
-                                       recog_dir=args.recog_dir,
-                                       streaming=args.recog_streaming,
-                                       progressbar=True,
-                                       fine_grained=True)
-            bleu_avg += bleu
-        else:
-            raise NotImplementedError(args.recog_metric)
-        elasped_time = time.time() - start_time
-        logger.info('Elasped time: %.3f [sec]' % elasped_time)
-        logger.info('RTF: %.3f' % (elasped_time / (dataset.n_frames * 0.01)))
+                model.lm_fwd = lm
+
+        # second path (forward)
+        if args.recog_lm_second is not None and args.recog_lm_second_weight > 0:
+            conf_lm_second = load_config(os.path.join(os.path.dirname(args.recog_lm_second), 'conf.yml'))
+            args_lm_second = argparse.Namespace()
+            for k, v in conf_lm_second.items():
+                setattr(args_lm_second, k, v)
+            args_lm_second.recog_mem_len = args.recog_mem_len
+            lm_second = build_lm(args_lm_second)
+            load_checkpoint(args.recog_lm_second, lm_second)
+            model.lm_second = lm_second
+
+        # second path (bakward)
+        if args.recog_lm_bwd is not None and args.recog_lm_bwd_weight > 0:
+            conf_lm = load_config(os.path.join(os.path.dirname(args.recog_lm_bwd), 'conf.yml'))
+            args_lm_bwd = argparse.Namespace()
+            for k, v in conf_lm.items():
+                setattr(args_lm_bwd, k, v)
+            args_lm_bwd.recog_mem_len = args.recog_mem_len
+            lm_bwd = build_lm(args_lm_bwd)
+            load_checkpoint(args.recog_lm_bwd, lm_bwd)
+            model.lm_bwd = lm_bwd
+
+    if not args.recog_unit:
+        args.recog_unit = args.unit
+
+    logger.info('recog unit: %s' % args.recog_unit)
+    logger.info('recog metric: %s' % args.recog_metric)
+    logger.info('recog oracle: %s' % args.recog_oracle)
+    logger.info('epoch: %d' % epoch)
+    logger.info('batch size: %d' % args.recog_batch_size)
+    logger.info('beam width: %d' % args.recog_beam_width)
+    logger.info('min length ratio: %.3f' % args.recog_min_len_ratio)
+    logger.info('max length ratio: %.3f' % args.recog_max_len_ratio)
+    logger.info('length penalty: %.3f' % args.recog_length_penalty)
+    logger.info('length norm: %s' % args.recog_length_norm)
+    logger.info('coverage penalty: %.3f' % args.recog_coverage_penalty)
+    logger.info('coverage threshold: %.3f' % args.recog_coverage_threshold)
+    logger.info('CTC weight: %.3f' % args.recog_ctc_weight)
+    logger.info('fist LM path: %s' % args.recog_lm)
+    logger.info('second LM path: %s' % args.recog_lm_second)
+    logger.info('backward LM path: %s' % args.recog_lm_bwd)
+    logger.info('LM weight (first-pass): %.3f' % args.recog_lm_weight)
+    logger.info('LM weight (second-pass): %.3f' % args.recog_lm_second_weight)
+    logger.info('LM weight (backward): %.3f' % args.recog_lm_bwd_weight)
+    logger.info('GNMT: %s' % args.recog_gnmt_decoding)
+    logger.info('forward-backward attention: %s' % args.recog_fwd_bwd_attention)
+    logger.info('resolving UNK: %s' % args.recog_resolving_unk)
+    logger.info('ensemble: %d' % (len(ensemble_models)))
+    logger.info('ASR decoder state carry over: %s' % (args.recog_asr_state_carry_over))
+    logger.info('LM state carry over: %s' % (args.recog_lm_state_carry_over))
+    logger.info('model average (Transformer): %d' % (args.recog_n_average))
+    logger.info('workers: %d' % (args.recog_n_workers))
+    logger.info('int8 quantization: %s' % (args.recog_quantize))
+
+    # GPU setting
+    if args.recog_n_gpus >= 1:
+        model.cudnn_setting(deterministic=True, benchmark=False)
+        model.cuda()
+    elif args.recog_quantize:
+        ensemble_models = [m.quantize_dynamic() for m in ensemble_models]
+
+    # NOTE: results of each set are saved in recog_dir/<set> when several sets are evaluated
+    # so that they do not overwrite each other, regardless of the number of workers
+    if len(datasets) > 1:
+        recog_dirs = [mkdir_join(args.recog_dir, dataset.set) for dataset in datasets]
+    else:
+        recog_dirs = [args.recog_dir]
+
+    n_workers = min(args.recog_n_workers, len(datasets))
+    if args.recog_n_gpus >= 1 and n_workers > 1:
+        # Decode several sets concurrently so that the GPU is kept busy.
+        # NOTE: decoders cache encoder-side features and states per utterance,
+        # so each worker needs its own replica of the models.
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = []
+            for w in range(n_workers):
+                models = ensemble_models if w == 0 else [copy.deepcopy(m) for m in ensemble_models]
+                futures += [executor.submit(evaluate_on_stream, models, datasets[w::n_workers],
+                                            recog_dirs[w::n_workers], recog_params, args, epoch)]
+            results = [None] * len(datasets)
+            for w, future in enumerate(futures):
+                results[w::n_workers] = future.result()
+    else:
+        results = [evaluate(ensemble_models, dataset, recog_params, args, epoch,
+                            recog_dir=recog_dir) for dataset, recog_dir in zip(datasets, recog_dirs)]
+
+    wer_avg, cer_avg, per_avg = 0, 0, 0
+    ppl_avg, loss_avg = 0, 0
+    acc_avg = 0
+    bleu_avg = 0
+    for metrics in results:
+        wer_avg += metrics.get('wer', 0)
+        cer_avg += metrics.get('cer', 0)
+        per_avg += metrics.get('per', 0)
+        ppl_avg += metrics.get('ppl', 0)
+        loss_avg += metrics.get('loss', 0)
+        acc_avg += metrics.get('acc', 0)
+        bleu_avg += metrics.get('bleu', 0)
 
     if args.recog_metric == 'edit_distance':
         if 'phone' in args.recog_unit:
@@ -240,8 +320,8 @@ def main():
         logger.info('Accuracy (avg.): %.2f\n' % (acc_avg / len(args.recog_sets)))
         print('Accuracy (avg.): %.3f' % (acc_avg / len(args.recog_sets)))
     elif args.recog_metric == 'bleu':
-        logger.info('BLEU (avg.): %.2f\n' % (bleu / len(args.recog_sets)))
-        print('BLEU (avg.): %.3f' % (bleu / len(args.recog_sets)))
+        logger.info('BLEU (avg.): %.2f\n' % (bleu_avg / len(args.recog_sets)))
+        print('BLEU (avg.): %.3f' % (bleu_avg / len(args.recog_sets)))
 
 
 if __name__ == '__main__':
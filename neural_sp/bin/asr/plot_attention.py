@@ -7,15 +7,23 @@
 """Plot attention weights of the attention model."""
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import io
 import logging
+import numpy as np
 import os
 import shutil
 import sys
 
 from neural_sp.bin.args_asr import parse_args_eval
 from neural_sp.bin.eval_utils import average_checkpoints
-from neural_sp.bin.plot_utils import plot_attention_weights
+from neural_sp.bin.plot_utils import (
+    plot_attention_weights,
+    slice_spectrograms,
+    write_figure
+)
 from neural_sp.bin.train_utils import (
     load_checkpoint,
     load_config,
@@ -39,6 +47,14 @@ def main():
         os.remove(os.path.join(args.recog_dir, 'plot.log'))
     set_logger(os.path.join(args.recog_dir, 'plot.log'), stdout=args.recog_stdout)
 
+    # Render figures in worker processes so that decoding of the next batch overlaps
+    # Otherwise, render them in memory and leave disk writes to a background thread
+    executor, writer = None, None
+    if args.recog_n_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.recog_n_workers)
+    else:
+        writer = ThreadPoolExecutor(max_workers=1)
+
     for i, s in enumerate(args.recog_sets):
         # Load dataset
         dataset = Dataset(corpus=args.corpus,
@@ -132,6 +148,11 @@ def main():
             shutil.rmtree(save_path)
             os.mkdir(save_path)
 
+        # Create speaker directories once instead of checking them per utterance
+        for spk in dataset.df['speaker'].unique():
+            os.makedirs(os.path.join(save_path, str(spk)), exist_ok=True)
+
+        futures = []
         while True:
             batch, is_new_epoch = dataset.next(recog_params['recog_batch_size'])
             best_hyps_id, aws = model.decode(
@@ -153,18 +174,31 @@ def main():
                 best_hyps_id = [hyp[::-1] for hyp in best_hyps_id]
                 aws = [aw[:, ::-1] for aw in aws]
 
+            # NOTE: half precision is enough for heatmaps and halves memory (and IPC to plot workers)
+            aws = [aw.astype(np.float16) for aw in aws]
+
+            token_lists = dataset.idx2token[0].batch(best_hyps_id, return_list=True)
+            spectrograms = None
+            if args.input_type == 'speech':
+                spectrograms = slice_spectrograms(batch['xs'], dataset.input_dim)
             for b in range(len(batch['xs'])):
-                tokens = dataset.idx2token[0](best_hyps_id[b], return_list=True)
-                spk = batch['speakers'][b]
+                tokens = token_lists[b]
+                spk = str(batch['speakers'][b])
 
-                plot_attention_weights(
-                    aws[b][:, :len(tokens)], tokens,
-                    spectrogram=batch['xs'][b][:, :dataset.input_dim] if args.input_type == 'speech' else None,
+                plot_kwargs = dict(
+                    spectrogram=spectrograms[b] if spectrograms is not None else None,
                     ref=batch['text'][b].lower(),
-                    save_path=mkdir_join(save_path, spk, batch['utt_ids'][b] + '.png'),
+                    save_path=os.path.join(save_path, spk, batch['utt_ids'][b] + '.png'),
                     figsize=(20, 8),
                     ctc_probs=ctc_probs[b, :xlens[b]] if ctc_probs is not None else None,
                     ctc_topk_ids=topk_ids[b] if topk_ids is not None else None)
+                if executor is not None:
+                    futures.append(executor.submit(
+                        plot_attention_weights, aws[b][:, :len(tokens)], tokens, **plot_kwargs))
+                else:
+                    buf = io.BytesIO()
+                    plot_attention_weights(aws[b][:, :len(tokens)], tokens, **dict(plot_kwargs, save_path=buf))
+                    futures.append(writer.submit(write_figure, plot_kwargs['save_path'], buf))
 
                 if model.bwd_weight > 0.5:
                     hyp = ' '.join(tokens[::-1])
@@ -178,6 +212,15 @@ def main():
             if is_new_epoch:
                 break
 
+        # Wait for all figures of this set (and raise errors in workers if any)
+        for future in futures:
+            future.result()
+
+    if executor is not None:
+        executor.shutdown()
+    if writer is not None:
+        writer.shutdown()
+
 
 if __name__ == '__main__':
     main()
@@ -6,6 +6,9 @@
 
 """Plot the CTC posteriors."""
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import io
 import logging
 import os
 import shutil
@@ -13,7 +16,11 @@ import sys
 
 from neural_sp.bin.args_asr import parse_args_eval
 from neural_sp.bin.eval_utils import average_checkpoints
-from neural_sp.bin.plot_utils import plot_ctc_probs
+from neural_sp.bin.plot_utils import (
+    plot_ctc_probs,
+    slice_spectrograms,
+    write_figure
+)
 from neural_sp.bin.train_utils import (
     load_checkpoint,
     set_logger
@@ -35,6 +42,14 @@ def main():
         os.remove(os.path.join(args.recog_dir, 'plot.log'))
     set_logger(os.path.join(args.recog_dir, 'plot.log'), stdout=args.recog_stdout)
 
+    # Render figures in worker processes so that decoding of the next batch overlaps
+    # Otherwise, render them in memory and leave disk writes to a background thread
+    executor, writer = None, None
+    if args.recog_n_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.recog_n_workers)
+    else:
+        writer = ThreadPoolExecutor(max_workers=1)
+
     for i, s in enumerate(args.recog_sets):
         # Load dataset
         dataset = Dataset(corpus=args.corpus,
@@ -79,6 +94,11 @@ def main():
             shutil.rmtree(save_path)
             os.mkdir(save_path)
 
+        # Create speaker directories once instead of checking them per utterance
+        for spk in dataset.df['speaker'].unique():
+            os.makedirs(os.path.join(save_path, str(spk)), exist_ok=True)
+
+        futures = []
         while True:
             batch, is_new_epoch = dataset.next(recog_params['recog_batch_size'])
             best_hyps_id, _ = model.decode(batch['xs'], recog_params)
@@ -88,16 +108,24 @@ def main():
                 batch['xs'], temperature=1, topk=min(100, model.vocab))
             # NOTE: ctc_probs: '[B, T, topk]'
 
+            token_lists = dataset.idx2token[0].batch(best_hyps_id, return_list=True)
+            spectrograms = slice_spectrograms(batch['xs'], dataset.input_dim)
             for b in range(len(batch['xs'])):
-                tokens = dataset.idx2token[0](best_hyps_id[b], return_list=True)
-                spk = batch['speakers'][b]
+                tokens = token_lists[b]
+                spk = str(batch['speakers'][b])
 
-                plot_ctc_probs(
-                    ctc_probs[b, :xlens[b]], topk_ids[b],
+                plot_kwargs = dict(
                     subsample_factor=args.subsample_factor,
-                    spectrogram=batch['xs'][b][:, :dataset.input_dim],
-                    save_path=mkdir_join(save_path, spk, batch['utt_ids'][b] + '.png'),
+                    spectrogram=spectrograms[b],
+                    save_path=os.path.join(save_path, spk, batch['utt_ids'][b] + '.png'),
                     figsize=(20, 8))
+                if executor is not None:
+                    futures.append(executor.submit(
+                        plot_ctc_probs, ctc_probs[b, :xlens[b]], topk_ids[b], **plot_kwargs))
+                else:
+                    buf = io.BytesIO()
+                    plot_ctc_probs(ctc_probs[b, :xlens[b]], topk_ids[b], **dict(plot_kwargs, save_path=buf))
+                    futures.append(writer.submit(write_figure, plot_kwargs['save_path'], buf))
 
                 hyp = ' '.join(tokens)
                 logger.info('utt-id: %s' % batch['utt_ids'][b])
@@ -108,6 +136,15 @@ def main():
             if is_new_epoch:
                 break
 
+        # Wait for all figures of this set (and raise errors in workers if any)
+        for future in futures:
+            future.result()
+
+    if executor is not None:
+        executor.shutdown()
+    if writer is not None:
+        writer.shutdown()
+
 
 if __name__ == '__main__':
     main()
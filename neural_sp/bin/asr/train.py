@@ -114,7 +114,8 @@ def main():
                       ctc_sub2=args.ctc_weight_sub2 > 0,
                       subsample_factor=args.subsample_factor,
                       subsample_factor_sub1=args.subsample_factor_sub1,
-                      subsample_factor_sub2=args.subsample_factor_sub2)
+                      subsample_factor_sub2=args.subsample_factor_sub2,
+                      cache_features=args.cache_dev_features)
     eval_sets = [Dataset(corpus=args.corpus,
                          tsv_path=s,
                          dict_path=args.dict,
@@ -122,7 +123,8 @@ def main():
                          unit=args.unit,
                          wp_model=args.wp_model,
                          batch_size=1,
-                         is_test=True) for s in args.eval_sets]
+                         is_test=True,
+                         cache_features=args.cache_dev_features) for s in args.eval_sets]
 
     args.vocab = train_set.vocab
     args.vocab_sub1 = train_set.vocab_sub1
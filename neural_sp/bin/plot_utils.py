@@ -21,6 +21,79 @@ green = '#006400'
 # sns.set(font='IPAMincho')
 sns.set(font='Noto Sans CJK JP')
 
+# NOTE: figures are reused across utterances (one per figure size) instead of
+# allocating a new Figure and its canvas for every plot
+_FIGURES = {}
+
+
+def _get_figure(figsize):
+    """Make a cleared figure of the given size current, reusing it across calls.
+
+    Args:
+        figsize (tuple): figure size in inches
+    Returns:
+        fig (matplotlib.figure.Figure):
+
+    """
+    figsize = tuple(figsize)
+    fig = _FIGURES.get(figsize)
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig = plt.figure(figsize=figsize)
+        _FIGURES[figsize] = fig
+    else:
+        plt.figure(fig.number)
+        fig.clf()
+    return fig
+
+
+def slice_spectrograms(xs, feat_dim):
+    """Slice static features of all utterances in a mini-batch with a single copy.
+
+    Args:
+        xs (list): A list of length `[B]`, which contains arrays of size `[T, input_dim]`
+        feat_dim (int): dimension of static features to plot
+    Returns:
+        spectrograms (list): A list of length `[B]`, which contains contiguous views of size `[T, feat_dim]`
+
+    """
+    xlens = [len(x) for x in xs]
+    spectrograms = np.concatenate([x[:, :feat_dim] for x in xs], axis=0)
+    return np.split(spectrograms, np.cumsum(xlens)[:-1], axis=0)
+
+
+def write_figure(save_path, buf):
+    """Write a figure rendered into memory to a file.
+
+    Args:
+        save_path (str): path to save a figure
+        buf (io.BytesIO): encoded figure
+
+    """
+    with open(save_path, 'wb') as f:
+        f.write(buf.getvalue())
+
+
+def _plot_heatmap(aw, yticklabels=[], cbar=False):
+    """Draw a matrix with imshow (much faster than sns.heatmap for large matrices).
+
+    Args:
+        aw (np.ndarray): A tensor of size `[L, T]`
+        yticklabels (list): labels for rows
+        cbar (bool): draw a colorbar
+
+    """
+    ax = plt.gca()
+    im = ax.imshow(aw, cmap='viridis', aspect='auto', interpolation='nearest')
+    ax.grid(False)
+    ax.set_xticks([])
+    if len(yticklabels) > 0:
+        ax.set_yticks(np.arange(len(yticklabels)))
+        ax.set_yticklabels(yticklabels)
+    else:
+        ax.set_yticks([])
+    if cbar:
+        plt.colorbar(im)
+
 
 def plot_attention_weights(aw, tokens=[], spectrogram=None, ref=None,
                            save_path=None, figsize=(20, 6),
@@ -45,17 +118,12 @@ def plot_attention_weights(aw, tokens=[], spectrogram=None, ref=None,
     if n_heads > 1:
         figsize = (20, 16)
 
-    plt.clf()
-    plt.figure(figsize=figsize)
+    _get_figure(figsize)
     # Plot attention weights
     for h in range(1, n_heads + 1):
         # plt.subplot(n_col, 1, h)
         plt.subplot(n_col, 1, n_heads - h + 1)
-        sns.heatmap(aw[h - 1, :, :], cmap='viridis',
-                    xticklabels=False,
-                    yticklabels=tokens if len(tokens) > 0 else False,
-                    cbar=False,
-                    cbar_kws={"orientation": "horizontal"})
+        _plot_heatmap(aw[h - 1, :, :], tokens)
         plt.ylabel(u'Output labels (←)', fontsize=12 if n_heads == 1 else 8)
         plt.yticks(rotation=0, fontsize=6)
 
@@ -87,9 +155,7 @@ def plot_attention_weights(aw, tokens=[], spectrogram=None, ref=None,
 
     # Save as a png file
     if save_path is not None:
-        plt.savefig(save_path, dvi=100)
-
-    plt.close()
+        plt.savefig(save_path, dpi=100)
 
 
 def plot_hierarchical_attention_weights(aw, aw_sub, tokens=[], tokens_sub=[],
@@ -109,36 +175,27 @@ def plot_hierarchical_attention_weights(aw, aw_sub, tokens=[], tokens_sub=[],
         figsize (tuple):
 
     """
-    plt.clf()
-    plt.figure(figsize=figsize)
+    _get_figure(figsize)
 
     if spectrogram is None:
         plt.subplot(211)
-        sns.heatmap(aw[0], cmap='viridis',
-                    xticklabels=False,
-                    yticklabels=tokens if len(tokens) > 0 else False)
+        _plot_heatmap(aw[0], tokens, cbar=True)
         plt.ylabel(u'Output labels (main) (←)', fontsize=12)
         plt.yticks(rotation=0, fontsize=6)
 
         plt.subplot(212)
-        sns.heatmap(aw_sub[0], cmap='viridis',
-                    xticklabels=False,
-                    yticklabels=tokens_sub if len(tokens_sub) > 0 else False)
+        _plot_heatmap(aw_sub[0], tokens_sub, cbar=True)
         plt.xlabel(u'Time [sec]', fontsize=12)
         plt.ylabel(u'Output labels (sub) (←)', fontsize=12)
         plt.yticks(rotation=0, fontsize=6)
     else:
         plt.subplot(311)
-        sns.heatmap(aw[0], cmap='viridis',
-                    xticklabels=False,
-                    yticklabels=tokens if len(tokens) > 0 else False)
+        _plot_heatmap(aw[0], tokens, cbar=True)
         plt.ylabel(u'Output labels (main) (←)', fontsize=12)
         plt.yticks(rotation=0, fontsize=6)
 
         plt.subplot(312)
-        sns.heatmap(aw_sub[0], cmap='viridis',
-                    xticklabels=False,
-                    yticklabels=tokens_sub if len(tokens_sub) > 0 else False)
+        _plot_heatmap(aw_sub[0], tokens_sub, cbar=True)
         plt.ylabel(u'Output labels (sub) (←)', fontsize=12)
         plt.yticks(rotation=0, fontsize=6)
 
@@ -152,9 +209,7 @@ def plot_hierarchical_attention_weights(aw, aw_sub, tokens=[], tokens_sub=[],
 
     # Save as a png file
     if save_path is not None:
-        plt.savefig(save_path, dvi=100)
-
-    plt.close()
+        plt.savefig(save_path, dpi=100)
 
 
 def plot_ctc_probs(ctc_probs, topk_ids, subsample_factor, space=-1, hyp='',
@@ -172,8 +227,7 @@ def plot_ctc_probs(ctc_probs, topk_ids, subsample_factor, space=-1, hyp='',
         topk (int):
 
     """
-    plt.clf()
-    plt.figure(figsize=figsize)
+    _get_figure(figsize)
     n_frames = ctc_probs.shape[0]
     times_probs = np.arange(n_frames) * subsample_factor / 100
     if len(hyp) > 0:
@@ -220,9 +274,7 @@ def plot_ctc_probs(ctc_probs, topk_ids, subsample_factor, space=-1, hyp='',
 
     # Save as a png file
     if save_path is not None:
-        plt.savefig(save_path, dvi=100)
-
-    plt.close()
+        plt.savefig(save_path, dpi=100)
 
 
 def plot_hierarchical_ctc_probs(ctc_probs, topk_ids, ctc_probs_sub, topk_ids_sub,
@@ -242,8 +294,7 @@ def plot_hierarchical_ctc_probs(ctc_probs, topk_ids, ctc_probs_sub, topk_ids_sub
     """
     # TODO(hirofumi): add spectrogram
 
-    plt.clf()
-    plt.figure(figsize=figsize)
+    _get_figure(figsize)
     n_frames = ctc_probs.shape[0]
     times_probs = np.arange(n_frames) * subsample_factor / 100
     if len(hyp) > 0:
@@ -289,6 +340,4 @@ def plot_hierarchical_ctc_probs(ctc_probs, topk_ids, ctc_probs_sub, topk_ids_sub
 
     # Save as a png file
     if save_path is not None:
-        plt.savefig(save_path, dvi=100)
-
-    plt.close()
+        plt.savefig(save_path, dpi=100)
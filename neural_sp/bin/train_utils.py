@@ -6,6 +6,7 @@
 
 """Utility functions for training."""
 
+import copy
 import functools
 import logging
 import numpy as np
@@ -73,11 +74,18 @@ def load_config(config_path):
         params (dict):
 
     """
-    with open(config_path, "r") as f:
-        conf = yaml.load(f, Loader=yaml.FullLoader)
+    params = _load_config(config_path, os.path.getmtime(config_path))
+    # NOTE: callers may modify the returned dict
+    return copy.deepcopy(params)
+
 
-    params = conf['param']
-    return params
+@functools.lru_cache(maxsize=None)
+def _load_config(config_path, mtime):
+    # NOTE: the same conf.yml is read several times per run (arguments, ensemble, LMs)
+    # libyaml-based loader is much faster than the pure-Python one if available
+    with open(config_path, "r") as f:
+        conf = yaml.load(f, Loader=getattr(yaml, 'CFullLoader', yaml.FullLoader))
+    return conf['param']
 
 
 def save_config(conf, save_path):
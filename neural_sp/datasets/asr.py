@@ -50,7 +50,7 @@ class Dataset(object):
                  wp_model_sub1=False, ctc_sub1=False, subsample_factor_sub1=1,
                  tsv_path_sub2=False, dict_path_sub2=False, unit_sub2=False,
                  wp_model_sub2=False, ctc_sub2=False, subsample_factor_sub2=1,
-                 discourse_aware=False, first_n_utterances=-1):
+                 discourse_aware=False, first_n_utterances=-1, cache_features=False):
         """A class for loading dataset.
 
         Args:
@@ -65,7 +65,7 @@ class Dataset(object):
             max_n_frames (int): exclude utterances longer than this value
             shuffle_bucket (bool): gather the similar length of utterances and shuffle them
             sort_by (str): sort all utterances in the ascending order
-                input: sort by input length
+                input: sort by input length (also available for the test set)
                 output: sort by output length
                 shuffle: shuffle all utterances
             short2long (bool): sort utterances in the descending order
@@ -78,6 +78,8 @@ class Dataset(object):
             corpus (str): name of corpus
             discourse_aware (bool):
             first_n_utterances (int): evaluate the first N utterances
+            cache_features (bool): keep loaded input features in memory
+                for datasets iterated many times (e.g., development set)
 
         """
         super(Dataset, self).__init__()
@@ -103,6 +105,7 @@ class Dataset(object):
         self.discourse_aware = discourse_aware
         if discourse_aware:
             assert not is_test
+        self.feat_cache = {} if cache_features else None
 
         self.vocab = count_vocab_size(dict_path)
         self.eos = 2
@@ -252,6 +255,10 @@ class Dataset(object):
                 df = df.sort_values(by=['ylen'], ascending=short2long)
             elif sort_by == 'shuffle':
                 df = df.reindex(np.random.permutation(self.df.index))
+        elif sort_by == 'input':
+            # NOTE: gather utterances of similar lengths in the same mini-batch
+            # to reduce padded frames in batch decoding
+            df = df.sort_values(by=['xlen'], ascending=short2long)
 
         # Re-indexing
         if discourse_aware:
@@ -362,9 +369,6 @@ class Dataset(object):
             df_indices_mb = self.df_indices_buckets.pop(0)
             self.offset += len(df_indices_mb)
             is_new_epoch = (len(self.df_indices_buckets) == 0)
-
-            # Shuffle uttrances in mini-batch
-            df_indices_mb = random.sample(df_indices_mb, len(df_indices_mb))
         else:
             if len(self.df_indices) > batch_size:
                 # Change batch size dynamically
@@ -388,12 +392,14 @@ class Dataset(object):
                 # Remove the rest
                 df_indices_mb = df_indices_mb[:batch_size]
 
-            # Shuffle uttrances in mini-batch
-            df_indices_mb = random.sample(df_indices_mb, len(df_indices_mb))
-
             for i in df_indices_mb:
                 self.df_indices.remove(i)
 
+        if not self.discourse_aware:
+            # NOTE: sort utterances in mini-batch by input length in the descending order
+            # so that RNN encoders can pack them without reordering the batch
+            df_indices_mb = sorted(df_indices_mb, key=lambda i: self.df['xlen'][i], reverse=True)
+
         return df_indices_mb, is_new_epoch
 
     def make_mini_batch(self, df_indices_mb):
@@ -414,7 +420,7 @@ class Dataset(object):
 
         """
         # inputs
-        xs = [kaldiio.load_mat(self.df['feat_path'][i]) for i in df_indices_mb]
+        xs = [self.load_feat(self.df['feat_path'][i]) for i in df_indices_mb]
 
         # outputs
         if self.is_test:
@@ -448,6 +454,21 @@ class Dataset(object):
         }
         return mini_batch_dict
 
+    def load_feat(self, feat_path):
+        """Load input features, reusing the in-memory cache if enabled.
+
+        Args:
+            feat_path (str): path to the feature in the Kaldi ark format
+        Returns:
+            x (np.ndarray): input features of size `[T, input_dim]`
+
+        """
+        if self.feat_cache is None:
+            return kaldiio.load_mat(feat_path)
+        if feat_path not in self.feat_cache:
+            self.feat_cache[feat_path] = kaldiio.load_mat(feat_path)
+        return self.feat_cache[feat_path]
+
     def set_batch_size(self, batch_size, min_xlen, min_ylen):
         if not self.dynamic_batching:
             return batch_size
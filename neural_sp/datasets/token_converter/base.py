@@ -0,0 +1,58 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Kyoto University (Hirofumi Inaguma)
+#  Apache 2.0  (http://www.apache.org/licenses/LICENSE-2.0)
+
+"""Base class for index -> token converters."""
+
+import numpy as np
+
+
+class Idx2tokenBase(object):
+    """Base class for converting indices into token sequences.
+
+    Subclasses fill `self.idx2token`, call `build_lookup()`, and implement `join()`.
+
+    """
+
+    def build_lookup(self):
+        # NOTE: look up tokens with a single numpy gather instead of a dict per token
+        self.idx2token_array = np.array(
+            [self.idx2token.get(i) for i in range(max(self.idx2token.keys()) + 1)], dtype=object)
+
+    def lookup(self, token_ids):
+        """Convert indices into a list of tokens.
+
+        Args:
+            token_ids (np.ndarray or list): token indices
+        Returns:
+            tokens (list): list of tokens
+
+        """
+        return self.idx2token_array[np.asarray(token_ids, dtype=np.int64)].tolist()
+
+    def join(self, tokens):
+        raise NotImplementedError
+
+    def batch(self, token_ids_list, return_list=False):
+        """Convert a mini-batch of index sequences at once.
+
+        Args:
+            token_ids_list (list): list of np.ndarray of token indices
+            return_list (bool): if True, return list of tokens per utterance
+        Returns:
+            texts (list): token sequences
+                or
+            tokens (list): list of list of tokens
+
+        """
+        ylens = [len(token_ids) for token_ids in token_ids_list]
+        token_ids_flat = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            np.asarray(token_ids, dtype=np.int64) for token_ids in token_ids_list])
+        flat = self.idx2token_array[token_ids_flat].tolist()
+        offsets = np.cumsum([0] + ylens)
+        token_lists = [flat[offsets[b]:offsets[b + 1]] for b in range(len(ylens))]
+        if return_list:
+            return token_lists
+        return [self.join(tokens) for tokens in token_lists]
@@ -9,6 +9,8 @@
 import codecs
 import os
 
+from neural_sp.datasets.token_converter.base import Idx2tokenBase
+
 
 class Char2idx(object):
     """Class for converting character sequence into indices.
@@ -68,7 +70,7 @@ class Char2idx(object):
         return token_ids
 
 
-class Idx2char(object):
+class Idx2char(Idx2tokenBase):
     """Class for converting indices into character sequence.
 
     Args:
@@ -93,6 +95,7 @@ class Idx2char(object):
         self.idx2token[self.vocab] = '<l2r>'
         self.idx2token[self.vocab + 1] = '<r2l>'
         self.idx2token[self.vocab + 2] = '<null>'
+        self.build_lookup()
 
     def __call__(self, token_ids, return_list=False):
         """Convert indices into character sequence.
@@ -106,7 +109,10 @@ class Idx2char(object):
             characters (list): list of characters
 
         """
-        characters = list(map(lambda c: self.idx2token[c], token_ids))
+        characters = self.lookup(token_ids)
         if return_list:
             return characters
-        return ''.join(characters).replace('<space>', ' ')
+        return self.join(characters)
+
+    def join(self, tokens):
+        return ''.join(tokens).replace('<space>', ' ')
@@ -8,6 +8,8 @@
 
 import codecs
 
+from neural_sp.datasets.token_converter.base import Idx2tokenBase
+
 
 class Phone2idx(object):
     """Class for converting phone sequence to indices.
@@ -43,7 +45,7 @@ class Phone2idx(object):
         return token_ids
 
 
-class Idx2phone(object):
+class Idx2phone(Idx2tokenBase):
     """Class for converting indices to phone sequence.
 
     Args:
@@ -66,6 +68,7 @@ class Idx2phone(object):
         self.idx2token[self.vocab] = '<l2r>'
         self.idx2token[self.vocab + 1] = '<r2l>'
         self.idx2token[self.vocab + 2] = '<null>'
+        self.build_lookup()
 
     def __call__(self, token_ids, return_list=False):
         """Convert indices to phone sequence.
@@ -79,7 +82,10 @@ class Idx2phone(object):
             phones (list): list of phones
 
         """
-        phones = list(map(lambda i: self.idx2token[i], token_ids))
+        phones = self.lookup(token_ids)
         if return_list:
             return phones
-        return ' '.join(phones)
+        return self.join(phones)
+
+    def join(self, tokens):
+        return ' '.join(tokens)
@@ -8,6 +8,8 @@
 
 import codecs
 
+from neural_sp.datasets.token_converter.base import Idx2tokenBase
+
 
 class Word2idx(object):
     """Class for converting word sequence into indices.
@@ -56,7 +58,7 @@ class Word2idx(object):
         return token_ids
 
 
-class Idx2word(object):
+class Idx2word(Idx2tokenBase):
     """Class for converting indices into word sequence.
 
     Args:
@@ -76,6 +78,7 @@ class Idx2word(object):
         self.idx2token[self.vocab] = '<l2r>'
         self.idx2token[self.vocab + 1] = '<r2l>'
         self.idx2token[self.vocab + 2] = '<null>'
+        self.build_lookup()
 
     def __call__(self, token_ids, return_list=False):
         """Convert indices into word sequence.
@@ -89,10 +92,13 @@ class Idx2word(object):
             words (list): list of words
 
         """
-        words = list(map(lambda w: self.idx2token[w], token_ids))
+        words = self.lookup(token_ids)
         if return_list:
             return words
-        return ' '.join(words)
+        return self.join(words)
+
+    def join(self, tokens):
+        return ' '.join(tokens)
 
 
 class Char2word(object):
@@ -9,6 +9,8 @@
 import codecs
 import sentencepiece as spm
 
+from neural_sp.datasets.token_converter.base import Idx2tokenBase
+
 
 class Wp2idx(object):
     """Class for converting word-piece sequence into indices.
@@ -55,7 +57,7 @@ class Wp2idx(object):
         return token_ids
 
 
-class Idx2wp(object):
+class Idx2wp(Idx2tokenBase):
     """Class for converting indices into word-piece sequence.
 
     Args:
@@ -76,6 +78,7 @@ class Idx2wp(object):
         self.idx2token[self.vocab] = '<l2r>'
         self.idx2token[self.vocab + 1] = '<r2l>'
         self.idx2token[self.vocab + 2] = '<null>'
+        self.build_lookup()
 
         self.sp = spm.SentencePieceProcessor()
         self.sp.Load(wp_model)
@@ -94,10 +97,13 @@ class Idx2wp(object):
         """
         if len(token_ids) == 0:
             return ''
-        wordpieces = list(map(lambda wp: self.idx2token[wp], token_ids))
+        wordpieces = self.lookup(token_ids)
         if return_list:
             return wordpieces
-        return self.sp.DecodePieces(wordpieces)
+        return self.join(wordpieces)
+
+    def join(self, tokens):
+        return self.sp.DecodePieces(tokens) if len(tokens) > 0 else ''
 
     def is_word_boundary(self):
         raise NotImplementedError
@@ -98,3 +98,27 @@ class ModelBase(nn.Module):
             # NOTE: this is slower than GPU mode.
         logger.info("torch.backends.cudnn.benchmark: %s" % torch.backends.cudnn.benchmark)
         logger.info("torch.backends.cudnn.enabled: %s" % torch.backends.cudnn.enabled)
+
+    def quantize_dynamic(self):
+        """Quantize weights in linear (and encoder RNN) layers into int8 for inference.
+
+        NOTE: dynamically quantized layers run on CPU only.
+
+        Returns:
+            model (nn.Module): quantized copy of this model
+
+        """
+        if not hasattr(torch, 'quantization') or not hasattr(torch.quantization, 'quantize_dynamic'):
+            logger.warning('Dynamic quantization is not supported in PyTorch %s' % torch.__version__)
+            return self
+        # NOTE: luong_concat attention reads a slice of its projection matrix directly
+        skip = [n + '.' for n, m in self.named_modules() if getattr(m, 'atype', None) == 'luong_concat']
+        targets = set(n for n, m in self.named_modules()
+                      if isinstance(m, nn.Linear) and not any(n.startswith(s) for s in skip))
+        logger.info('Quantize %d modules into int8' % len(targets))
+        model = torch.quantization.quantize_dynamic(self, targets, dtype=torch.qint8)
+        # NOTE: encoders that can run with int8 RNN layers quantize them by themselves
+        for name, module in list(model.named_children()):
+            if hasattr(module, 'optimize_for_inference'):
+                setattr(model, name, module.optimize_for_inference())
+        return model
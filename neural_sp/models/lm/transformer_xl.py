@@ -283,5 +283,5 @@ class TransformerXL(LMBase):
                 ax.yaxis.set_major_locator(MaxNLocator(integer=True))
 
             fig.tight_layout()
-            fig.savefig(os.path.join(save_path, 'layer%d.png' % (lth)), dvi=500)
+            fig.savefig(os.path.join(save_path, 'layer%d.png' % (lth)), dpi=150)
             plt.close()
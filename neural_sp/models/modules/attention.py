@@ -6,9 +6,9 @@
 
 """Single-head attention layer."""
 
-import numpy as np
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 
 class AttentionMechanism(nn.Module):
@@ -32,6 +32,9 @@ class AttentionMechanism(nn.Module):
 
     """
 
+    # NOTE: version 2 projects keys in triggered attention
+    _version = 2
+
     def __init__(self, kdim, qdim, adim, atype,
                  sharpening_factor=1, sigmoid_smoothing=False,
                  conv_out_channels=10, conv_kernel_size=201, dropout=0.,
@@ -46,6 +49,7 @@ class AttentionMechanism(nn.Module):
         self.sigmoid_smoothing = sigmoid_smoothing
         self.n_heads = 1
         self.lookahead = lookahead
+        self.project_key = True
         self.reset()
 
         # attention dropout applied after the softmax layer
@@ -90,6 +94,14 @@ class AttentionMechanism(nn.Module):
         else:
             raise ValueError(atype)
 
+    def _load_from_state_dict(self, state_dict, prefix, local_metadata, *args, **kwargs):
+        # NOTE: triggered attention used raw keys before version 2 (w_key was never trained),
+        # so keep decoding older checkpoints in the same way
+        if self.atype == 'triggered_attention':
+            self.project_key = local_metadata.get('version', 1) >= 2
+        super(AttentionMechanism, self)._load_from_state_dict(
+            state_dict, prefix, local_metadata, *args, **kwargs)
+
     def reset(self):
         self.key = None
         self.mask = None
@@ -125,9 +137,13 @@ class AttentionMechanism(nn.Module):
 
         # Pre-computation of encoder-side features for computing scores
         if self.key is None or not cache:
-            if self.atype in ['add', 'trigerred_attention',
-                              'location', 'dot', 'luong_general']:
+            if self.atype in ['add', 'location', 'dot', 'luong_general']:
+                self.key = self.w_key(key)
+            elif self.atype == 'triggered_attention' and self.project_key:
                 self.key = self.w_key(key)
+            elif self.atype == 'luong_concat':
+                # W [key; query] = W_k key + W_q query, and W_k key is time-invariant
+                self.key = F.linear(key, self.w.weight[:, :key.size(-1)])
             else:
                 self.key = key
             self.mask = mask
@@ -158,11 +174,11 @@ class AttentionMechanism(nn.Module):
             e = torch.bmm(query, self.key.transpose(2, 1))
 
         elif self.atype == 'luong_concat':
-            query = query.repeat([1, klen, 1])
-            e = self.v(torch.tanh(self.w(torch.cat([self.key, query], dim=-1)))).transpose(2, 1)
+            query = F.linear(query, self.w.weight[:, -query.size(-1):])
+            e = self.v(torch.tanh(self.key.unsqueeze(1) + query.unsqueeze(2))).squeeze(3)
         assert e.size() == (bs, qlen, klen), (e.size(), (bs, qlen, klen))
 
-        NEG_INF = float(np.finfo(torch.tensor(0, dtype=e.dtype).numpy().dtype).min)
+        NEG_INF = float(torch.finfo(e.dtype).min)
 
         # Mask the right part from the trigger point
         if self.atype == 'triggered_attention':
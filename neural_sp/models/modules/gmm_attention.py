@@ -7,7 +7,6 @@
 """GMM attention."""
 
 import math
-import numpy as np
 import torch
 import torch.nn as nn
 
@@ -88,7 +87,7 @@ class GMMAttention(nn.Module):
 
         # Compute context vector
         if self.mask is not None:
-            NEG_INF = float(np.finfo(torch.tensor(0, dtype=myu.dtype).numpy().dtype).min)
+            NEG_INF = float(torch.finfo(myu.dtype).min)
             aw = aw.masked_fill_(self.mask == 0, NEG_INF)
         cv = torch.bmm(aw, value)
 
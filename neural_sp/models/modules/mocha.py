@@ -11,7 +11,6 @@
 
 import logging
 import math
-import numpy as np
 import random
 import torch
 import torch.nn as nn
@@ -151,7 +150,7 @@ class MonotonicEnergy(nn.Module):
         if self.r is not None:
             e = e + self.r
         if m is not None:
-            NEG_INF = float(np.finfo(torch.tensor(0, dtype=e.dtype).numpy().dtype).min)
+            NEG_INF = float(torch.finfo(e.dtype).min)
             e = e.masked_fill_(m == 0, NEG_INF)
         assert e.size() == (bs, self.n_heads, qlen, klen), \
             (e.size(), (bs, self.n_heads, qlen, klen))
@@ -256,7 +255,7 @@ class ChunkEnergy(nn.Module):
             r = torch.matmul(query, k) / self.scale
 
         if m is not None:
-            NEG_INF = float(np.finfo(torch.tensor(0, dtype=r.dtype).numpy().dtype).min)
+            NEG_INF = float(torch.finfo(r.dtype).min)
             r = r.masked_fill_(m == 0, NEG_INF)
         assert r.size() == (bs, self.n_heads, qlen, klen), \
             (r.size(), (bs, self.n_heads, qlen, klen))
@@ -744,7 +743,7 @@ def hard_chunkwise_attention(alpha, u, mask, chunk_size, n_heads_chunk,
                 else:
                     mask[b, h, :, 0, max(0, boundary - chunk_size + 1):boundary + 1] = 1
 
-    NEG_INF = float(np.finfo(torch.tensor(0, dtype=u.dtype).numpy().dtype).min)
+    NEG_INF = float(torch.finfo(u.dtype).min)
     u = u.masked_fill(mask == 0, NEG_INF)
     beta = torch.softmax(u, dim=-1)
     return beta.view(bs, -1, qlen, klen)
@@ -12,10 +12,10 @@ from __future__ import print_function
 
 import logging
 import math
-import numpy as np
 import random
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 random.seed(1)
 
@@ -94,7 +94,8 @@ class MultiheadAttentionMechanism(nn.Module):
         self.mask = None
 
     def forward(self, key, value, query, mask, aw_prev=None,
-                cache=False, mode='', trigger_point=None, eps_wait=-1):
+                cache=False, mode='', trigger_point=None, eps_wait=-1,
+                need_weights=True):
         """Forward pass.
 
         Args:
@@ -107,6 +108,8 @@ class MultiheadAttentionMechanism(nn.Module):
             mode: dummy interface for MoChA
             trigger_point: dummy interface for MoChA
             eps_wait: dummy interface for MMA
+            need_weights (bool): return attention weights. If False, the fused
+                kernel (PyTorch>=2.0) is used when available and aw is None
         Returns:
             cv (FloatTensor): `[B, qlen, vdim]`
             aw (FloatTensor): `[B, H, qlen, klen]`
@@ -128,6 +131,10 @@ class MultiheadAttentionMechanism(nn.Module):
 
         query = self.w_query(query).view(bs, -1, self.n_heads, self.d_k)  # `[B, qlen, H, d_k]`
 
+        if not need_weights and self.atype == 'scaled_dot' and hasattr(F, 'scaled_dot_product_attention') \
+                and not (self.dropout_head > 0 and self.training):
+            return self._fused_forward(query, bs), None, None, None
+
         if self.atype == 'scaled_dot':
             e = torch.einsum("bihd,bjhd->bijh", (query, self.key)) / self.scale  # `[B, qlen, klen, H]`
         elif self.atype == 'add':
@@ -138,7 +145,7 @@ class MultiheadAttentionMechanism(nn.Module):
 
         # Compute attention weights
         if self.mask is not None:
-            NEG_INF = float(np.finfo(torch.tensor(0, dtype=e.dtype).numpy().dtype).min)
+            NEG_INF = float(torch.finfo(e.dtype).min)
             e = e.masked_fill_(self.mask == 0, NEG_INF)  # `[B, qlen, klen, H]`
         aw = torch.softmax(e, dim=2)
         aw = self.dropout_attn(aw)
@@ -163,3 +170,24 @@ class MultiheadAttentionMechanism(nn.Module):
         aw = aw.permute(0, 3, 1, 2)  # `[B, H, qlen, klen]`
 
         return cv, aw, None, None
+
+    def _fused_forward(self, query, bs):
+        """Attention without materializing weights (FlashAttention-style kernel).
+
+        Args:
+            query (FloatTensor): `[B, qlen, H, d_k]`
+            bs (int): batch size
+        Returns:
+            cv (FloatTensor): `[B, qlen, vdim]`
+
+        """
+        attn_mask = None
+        if self.mask is not None:
+            NEG_INF = float(torch.finfo(query.dtype).min)
+            attn_mask = query.new_zeros(self.mask.size()).masked_fill_(self.mask == 0, NEG_INF)
+            attn_mask = attn_mask.permute(0, 3, 1, 2)  # `[B, H, qlen, klen]`
+        cv = F.scaled_dot_product_attention(
+            query.transpose(2, 1), self.key.transpose(2, 1), self.value.transpose(2, 1),
+            attn_mask=attn_mask, dropout_p=self.dropout_attn.p if self.training else 0.)  # `[B, H, qlen, d_k]`
+        cv = cv.transpose(2, 1).contiguous().view(bs, -1, self.n_heads * self.d_k)  # `[B, qlen, H * d_k]`
+        return self.w_out(cv)
@@ -8,7 +8,6 @@
 
 import logging
 import math
-import numpy as np
 import torch
 import torch.nn as nn
 
@@ -141,7 +140,7 @@ class RelativeMultiheadAttentionMechanism(nn.Module):
 
         # Compute attention weights
         if mask is not None:
-            NEG_INF = float(np.finfo(torch.tensor(0, dtype=e.dtype).numpy().dtype).min)
+            NEG_INF = float(torch.finfo(e.dtype).min)
             e = e.masked_fill_(mask == 0, NEG_INF)  # `[B, qlen, klen+mlen, H]`
         aw = torch.softmax(e, dim=2)
         aw = self.dropout(aw)  # `[B, qlen, klen+mlen, H]`
@@ -166,7 +166,7 @@ class TransformerDecoderBlock(nn.Module):
 
     def forward(self, ys, yy_mask, xs=None, xy_mask=None, cache=None,
                 xy_aws_prev=None, mode='hard', eps_wait=-1, lmout=None,
-                pos_embs=None, memory=None, u=None, v=None):
+                pos_embs=None, memory=None, u=None, v=None, cache_src=False):
         """Transformer decoder forward pass.
 
         Args:
@@ -184,6 +184,7 @@ class TransformerDecoderBlock(nn.Module):
             u (FloatTensor): global parameter for TransformerXL
             v (FloatTensor): global parameter for TransformerXL
             eps_wait (int): wait time delay for head-synchronous decoding in MMA
+            cache_src (bool): reuse key/value projections of xs cached in src_attn
         Returns:
             out (FloatTensor): `[B, L, d_model]`
 
@@ -210,7 +211,9 @@ class TransformerDecoderBlock(nn.Module):
                 pos_embs = pos_embs[-ys_q.size(1):]
             out, self._yy_aws = self.self_attn(ys, ys_q, memory, pos_embs, yy_mask, u, v)
         else:
-            out, self._yy_aws = self.self_attn(ys, ys, ys_q, mask=yy_mask)[:2]  # k/v/q
+            # NOTE: attention weights are kept only for visualization in teacher-forcing evaluation
+            out, self._yy_aws = self.self_attn(ys, ys, ys_q, mask=yy_mask,
+                                               need_weights=not self.training and cache is None)[:2]  # k/v/q
         out = self.dropout(out) + residual
 
         # attention over encoder stacks
@@ -219,7 +222,7 @@ class TransformerDecoderBlock(nn.Module):
             out = self.norm2(out)
             out, self._xy_aws, self._xy_aws_beta, self._xy_aws_p_choose = self.src_attn(
                 xs, xs, out, mask=xy_mask,  # k/v/q
-                aw_prev=xy_aws_prev, mode=mode, eps_wait=eps_wait)
+                aw_prev=xy_aws_prev, mode=mode, eps_wait=eps_wait, cache=cache_src)
             out = self.dropout(out) + residual
 
         # LM integration
@@ -89,7 +89,7 @@ class DecoderBase(ModelBase):
                 # ax.set_yticklabels(ys + [''])
 
             fig.tight_layout()
-            fig.savefig(os.path.join(_save_path, '%s.png' % k), dvi=500)
+            fig.savefig(os.path.join(_save_path, '%s.png' % k), dpi=150)
             plt.close()
 
     def _plot_ctc(self, save_path, topk=10):
@@ -128,7 +128,7 @@ class DecoderBase(ModelBase):
         plt.yticks(list(range(0, 2, 1)))
 
         plt.tight_layout()
-        plt.savefig(os.path.join(_save_path, '%s.png' % 'prob'), dvi=500)
+        plt.savefig(os.path.join(_save_path, '%s.png' % 'prob'), dpi=150)
         plt.close()
 
     def decode_ctc(self, eouts, elens, params, idx2token,
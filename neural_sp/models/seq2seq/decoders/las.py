@@ -37,6 +37,7 @@ from neural_sp.models.torch_utils import repeat
 from neural_sp.models.torch_utils import pad_list
 from neural_sp.models.torch_utils import np2tensor
 from neural_sp.models.torch_utils import tensor2np
+from neural_sp.models.torch_utils import tensors2np
 
 import matplotlib
 matplotlib.use('Agg')
@@ -874,8 +875,9 @@ class RNNDecoder(DecoderBase):
             assert trigger_points is not None
 
         hyps_batch, aws_batch = [], []
-        ylens = torch.zeros(bs).int()
-        eos_flags = [False] * bs
+        # NOTE: keep flags on the device not to synchronize per utterance
+        ylens = eouts.new_zeros(bs).int()
+        eos_flags = eouts.new_zeros(bs).byte()
         ymax = math.ceil(xmax * max_len_ratio)
         for t in range(ymax):
             # Update LM states for LM fusion
@@ -894,21 +896,22 @@ class RNNDecoder(DecoderBase):
             hyps_batch += [y]
 
             # Count lengths of hypotheses
-            for b in range(bs):
-                if not eos_flags[b]:
-                    if y[b].item() == self.eos:
-                        eos_flags[b] = True
-                        if self.discourse_aware:
-                            self.dstate_prev['hxs'][b] = dstates['dstate'][0][:, b:b + 1]
-                            if self.rnn_type == 'lstm':
-                                self.dstate_prev['cxs'][b] = dstates['dstate'][1][:, b:b + 1]
-                    ylens[b] += 1  # include <eos>
+            ylens += (eos_flags == 0).int()  # include <eos>
+            is_eos = (y[:, 0] == self.eos).byte() & (eos_flags == 0).byte()
+            if self.discourse_aware:
+                for b in is_eos.nonzero().view(-1).tolist():
+                    self.dstate_prev['hxs'][b] = dstates['dstate'][0][:, b:b + 1]
+                    if self.rnn_type == 'lstm':
+                        self.dstate_prev['cxs'][b] = dstates['dstate'][1][:, b:b + 1]
+            eos_flags |= is_eos
 
             # Break if <eos> is outputed in all mini-batch
-            if sum(eos_flags) == bs:
+            if eos_flags.all():
                 break
             if t == ymax - 1:
                 break
+        ylens = ylens.cpu()
+        eos_flags = eos_flags.tolist()
 
         # ASR state carry over
         if self.discourse_aware:
@@ -1316,10 +1319,10 @@ class RNNDecoder(DecoderBase):
             if self.bwd:
                 # Reverse the order
                 nbest_hyps_idx += [[np.array(end_hyps[n]['hyp'][1:][::-1]) for n in range(nbest)]]
-                aws += [tensor2np(torch.cat(end_hyps[0]['aws'][1:][::-1], dim=2).squeeze(0))]
+                aws += [torch.cat(end_hyps[0]['aws'][1:][::-1], dim=2).squeeze(0)]
             else:
                 nbest_hyps_idx += [[np.array(end_hyps[n]['hyp'][1:]) for n in range(nbest)]]
-                aws += [tensor2np(torch.cat(end_hyps[0]['aws'][1:], dim=2).squeeze(0))]
+                aws += [torch.cat(end_hyps[0]['aws'][1:], dim=2).squeeze(0)]
             if length_norm:
                 scores += [[end_hyps[n]['score_att'] / len(end_hyps[n]['hyp'][1:]) for n in range(nbest)]]
             else:
@@ -1328,6 +1331,9 @@ class RNNDecoder(DecoderBase):
             # Check <eos>
             eos_flags.append([(end_hyps[n]['hyp'][-1] == self.eos) for n in range(nbest)])
 
+        # Copy attention weights of all utterances to host at once
+        aws = tensors2np(aws)
+
         # Exclude <eos> (<sos> in case of the backward decoder)
         if exclude_eos:
             if self.bwd:
@@ -29,6 +29,7 @@ from neural_sp.models.torch_utils import append_sos_eos
 from neural_sp.models.torch_utils import compute_accuracy
 from neural_sp.models.torch_utils import make_pad_mask
 from neural_sp.models.torch_utils import tensor2np
+from neural_sp.models.torch_utils import tensors2np
 
 import matplotlib
 matplotlib.use('Agg')
@@ -529,10 +530,15 @@ class TransformerDecoder(DecoderBase):
         ys = eouts.new_zeros(bs, 1).fill_(self.eos).long()
 
         cache = [None] * self.n_layers
+        # key/value projections of eouts are computed once and reused at every step
+        for layer in self.layers:
+            if layer.src_tgt_attention:
+                layer.src_attn.reset()
 
         hyps_batch = []
-        ylens = torch.zeros(bs).int()
-        eos_flags = [False] * bs
+        # NOTE: keep flags on the device not to synchronize per utterance
+        ylens = eouts.new_zeros(bs).int()
+        eos_flags = eouts.new_zeros(bs).byte()
         ymax = math.ceil(xtime * max_len_ratio)
         for t in range(ymax):
             causal_mask = eouts.new_ones(t + 1, t + 1).byte()
@@ -541,7 +547,7 @@ class TransformerDecoder(DecoderBase):
             new_cache = [None] * self.n_layers
             out = self.pos_enc(self.embed(ys))  # scaled
             for lth, layer in enumerate(self.layers):
-                out = layer(out, causal_mask, eouts, None, cache=cache[lth])
+                out = layer(out, causal_mask, eouts, None, cache=cache[lth], cache_src=True)
                 new_cache[lth] = out
 
             if cache_states:
@@ -552,19 +558,18 @@ class TransformerDecoder(DecoderBase):
             hyps_batch += [y]
 
             # Count lengths of hypotheses
-            for b in range(bs):
-                if not eos_flags[b]:
-                    if y[b].item() == self.eos:
-                        eos_flags[b] = True
-                    ylens[b] += 1  # include <eos>
+            ylens += (eos_flags == 0).int()  # include <eos>
+            eos_flags |= (y[:, 0] == self.eos).byte()
 
             # Break if <eos> is outputed in all mini-batch
-            if sum(eos_flags) == bs:
+            if eos_flags.all():
                 break
             if t == ymax - 1:
                 break
 
             ys = torch.cat([ys, y], dim=-1)
+        ylens = ylens.cpu()
+        eos_flags = eos_flags.tolist()
 
         # Concatenate in L dimension
         hyps_batch = tensor2np(torch.cat(hyps_batch, dim=1))
@@ -950,15 +955,18 @@ class TransformerDecoder(DecoderBase):
             if self.bwd:
                 # Reverse the order
                 nbest_hyps_idx += [[np.array(end_hyps[n]['hyp'][1:][::-1]) for n in range(nbest)]]
-                aws += [tensor2np(torch.cat(end_hyps[0]['aws'][1:][::-1], dim=2).squeeze(0))]
+                aws += [torch.cat(end_hyps[0]['aws'][1:][::-1], dim=2).squeeze(0)]
             else:
                 nbest_hyps_idx += [[np.array(end_hyps[n]['hyp'][1:]) for n in range(nbest)]]
-                aws += [tensor2np(torch.cat(end_hyps[0]['aws'][1:], dim=2).squeeze(0))]
+                aws += [torch.cat(end_hyps[0]['aws'][1:], dim=2).squeeze(0)]
             scores += [[end_hyps[n]['score_attn'] for n in range(nbest)]]
 
             # Check <eos>
             eos_flags.append([(end_hyps[n]['hyp'][-1] == self.eos) for n in range(nbest)])
 
+        # Copy attention weights of all utterances to host at once
+        aws = tensors2np(aws)
+
         # Exclude <eos> (<sos> in case of the backward decoder)
         if exclude_eos:
             if self.bwd:
@@ -136,7 +136,8 @@ def build_encoder(args):
             task_specific_layer=args.task_specific_layer,
             param_init=args.param_init,
             chunk_size_left=args.lc_chunk_size_left,
-            chunk_size_right=args.lc_chunk_size_right)
+            chunk_size_right=args.lc_chunk_size_right,
+            amp_dtype=getattr(args, 'enc_amp_dtype', None))
         # NOTE: pure Conv/TDS/GatedConv encoders are also included
 
     return encoder
@@ -401,20 +401,18 @@ def update_lens_1d(seq_lens, layer, device_id=-1):
     if seq_lens is None:
         return seq_lens
     assert type(layer) in [nn.Conv1d, nn.MaxPool1d]
-    seq_lens = [_update_1d(seq_len, layer) for seq_len in seq_lens]
-    seq_lens = torch.IntTensor(seq_lens)
+    seq_lens = _update_1d(seq_lens.cpu().int() if torch.is_tensor(seq_lens) else torch.IntTensor(seq_lens), layer)
     if device_id >= 0:
         seq_lens = seq_lens.cuda(device_id)
     return seq_lens
 
 
-def _update_1d(seq_len, layer):
+def _update_1d(seq_lens, layer):
+    # NOTE: ceil(a / b) == (a + b - 1) // b and floor(a / b) == a // b for the whole batch at once
     if type(layer) == nn.MaxPool1d and layer.ceil_mode:
-        return math.ceil(
-            (seq_len + 1 + 2 * layer.padding - (layer.kernel_size - 1) - 1) / layer.stride + 1)
+        return (seq_lens + 1 + 2 * layer.padding - (layer.kernel_size - 1) - 1 + layer.stride - 1) // layer.stride + 1
     else:
-        return math.floor(
-            (seq_len + 2 * layer.padding[0] - (layer.kernel_size[0] - 1) - 1) / layer.stride[0] + 1)
+        return (seq_lens + 2 * layer.padding[0] - (layer.kernel_size[0] - 1) - 1) // layer.stride[0] + 1
 
 
 def update_lens_2d(seq_lens, layer, dim=0, device_id=-1):
@@ -432,20 +430,19 @@ def update_lens_2d(seq_lens, layer, dim=0, device_id=-1):
     if seq_lens is None:
         return seq_lens
     assert type(layer) in [nn.Conv2d, nn.MaxPool2d]
-    seq_lens = [_update_2d(seq_len, layer, dim) for seq_len in seq_lens]
-    seq_lens = torch.IntTensor(seq_lens)
+    seq_lens = _update_2d(seq_lens.cpu().int() if torch.is_tensor(seq_lens) else torch.IntTensor(seq_lens),
+                          layer, dim)
     if device_id >= 0:
         seq_lens = seq_lens.cuda(device_id)
     return seq_lens
 
 
-def _update_2d(seq_len, layer, dim):
+def _update_2d(seq_lens, layer, dim):
     if type(layer) == nn.MaxPool2d and layer.ceil_mode:
-        return math.ceil(
-            (seq_len + 1 + 2 * layer.padding[dim] - (layer.kernel_size[dim] - 1) - 1) / layer.stride[dim] + 1)
+        stride = layer.stride[dim]
+        return (seq_lens + 1 + 2 * layer.padding[dim] - (layer.kernel_size[dim] - 1) - 1 + stride - 1) // stride + 1
     else:
-        return math.floor(
-            (seq_len + 2 * layer.padding[dim] - (layer.kernel_size[dim] - 1) - 1) / layer.stride[dim] + 1)
+        return (seq_lens + 2 * layer.padding[dim] - (layer.kernel_size[dim] - 1) - 1) // layer.stride[dim] + 1
 
 
 def parse_cnn_config(channels, kernel_sizes, strides, poolings):
@@ -94,5 +94,5 @@ class EncoderBase(ModelBase):
                 ax.yaxis.set_major_locator(MaxNLocator(integer=True))
 
             fig.tight_layout()
-            fig.savefig(os.path.join(_save_path, '%s.png' % k), dvi=500)
+            fig.savefig(os.path.join(_save_path, '%s.png' % k), dpi=150)
             plt.close()
@@ -15,12 +15,14 @@ import torch.nn as nn
 
 from torch.nn.utils.rnn import pack_padded_sequence
 from torch.nn.utils.rnn import pad_packed_sequence
+from torch.nn.utils.rnn import PackedSequence
 
 from neural_sp.models.seq2seq.encoders.conv import ConvEncoder
 from neural_sp.models.seq2seq.encoders.conv import update_lens_1d
 from neural_sp.models.seq2seq.encoders.encoder_base import EncoderBase
 from neural_sp.models.seq2seq.encoders.gated_conv import GatedConvEncoder
 from neural_sp.models.seq2seq.encoders.tds import TDSEncoder
+from neural_sp.models.torch_utils import autocast
 
 
 logger = logging.getLogger(__name__)
@@ -58,6 +60,7 @@ class RNNEncoder(EncoderBase):
         param_init (float): model initialization parameter
         chunk_size_left (int): left chunk size for latency-controlled bidirectional encoder
         chunk_size_right (int): right chunk size for latency-controlled bidirectional encoder
+        amp_dtype (str): float16/bfloat16 to run the encoder under autocast (None: float32)
 
     """
 
@@ -68,7 +71,7 @@ class RNNEncoder(EncoderBase):
                  conv_in_channel, conv_channels, conv_kernel_sizes, conv_strides, conv_poolings,
                  conv_batch_norm, conv_layer_norm, conv_bottleneck_dim,
                  bidir_sum_fwd_bwd, task_specific_layer, param_init,
-                 chunk_size_left, chunk_size_right):
+                 chunk_size_left, chunk_size_right, amp_dtype):
 
         super(RNNEncoder, self).__init__()
 
@@ -93,6 +96,7 @@ class RNNEncoder(EncoderBase):
         self.n_dirs = 2 if self.bidirectional else 1
         self.n_layers = n_layers
         self.bidir_sum = bidir_sum_fwd_bwd
+        self.amp_dtype = getattr(torch, amp_dtype) if amp_dtype else None
 
         # for latency-controlled
         self.chunk_size_left = chunk_size_left // n_stacks
@@ -158,6 +162,16 @@ class RNNEncoder(EncoderBase):
 
         self.padding = Padding(bidir_sum_fwd_bwd=bidir_sum_fwd_bwd)
 
+        # NOTE: consecutive RNN layers without projection/subsampling in between are fused
+        # into a single multi-layer RNN, which runs as one cuDNN call. Layers are split only
+        # where the outputs for the sub tasks are taken.
+        self.fuse_layers = not self.lc_bidir and not bidir_sum_fwd_bwd and n_projs == 0 and np.prod(subsamples) == 1
+        # index of the last layer in each RNN module
+        if self.fuse_layers:
+            self.layer_ids = sorted(set([n_layers_sub2 - 1, n_layers_sub1 - 1, n_layers - 1]) - set([-1]))
+        else:
+            self.layer_ids = list(range(n_layers))
+
         if rnn_type not in ['conv', 'tds', 'gated_conv']:
             self.rnn = nn.ModuleList()
             if self.lc_bidir:
@@ -177,8 +191,11 @@ class RNNEncoder(EncoderBase):
                 if self.lc_bidir:
                     self.rnn += [rnn_i(self._odim, n_units, 1, batch_first=True)]
                     self.rnn_bwd += [rnn_i(self._odim, n_units, 1, batch_first=True)]
-                else:
-                    self.rnn += [rnn_i(self._odim, n_units, 1, batch_first=True,
+                elif lth == 0 or lth - 1 in self.layer_ids:
+                    # stack layers up to the next sub-task branch (or the last layer)
+                    n_layers_i = min(i for i in self.layer_ids if i >= lth) - lth + 1
+                    self.rnn += [rnn_i(self._odim, n_units, n_layers_i, batch_first=True,
+                                       dropout=dropout if n_layers_i > 1 else 0.,
                                        bidirectional=self.bidirectional)]
                 self._odim = n_units if bidir_sum_fwd_bwd else n_units * self.n_dirs
 
@@ -267,6 +284,33 @@ class RNNEncoder(EncoderBase):
             else:
                 raise ValueError(n)
 
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # NOTE: convert checkpoints saved with one RNN module per layer to the fused layout
+        if len(self.layer_ids) < self.n_layers and prefix + 'rnn.%d.weight_ih_l0' % (self.n_layers - 1) in state_dict:
+            for lth in range(self.n_layers):
+                i = sum(1 for j in self.layer_ids if j < lth)
+                offset = self.layer_ids[i - 1] + 1 if i > 0 else 0
+                for k in [k for k in state_dict.keys() if k.startswith(prefix + 'rnn.%d.' % lth)]:
+                    name = k[len(prefix + 'rnn.%d.' % lth):].replace('_l0', '_l%d' % (lth - offset))
+                    state_dict[prefix + 'rnn.%d.%s' % (i, name)] = state_dict.pop(k)
+        super(RNNEncoder, self)._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+    def optimize_for_inference(self):
+        """Quantize weights in RNN and linear layers into int8 for CPU inference.
+
+        Returns:
+            encoder (nn.Module): quantized copy of this encoder
+
+        """
+        if not hasattr(torch, 'quantization') or not hasattr(torch.quantization, 'quantize_dynamic'):
+            logger.warning('Dynamic quantization is not supported in PyTorch %s' % torch.__version__)
+            return self
+        self.eval()
+        # NOTE: CNN blocks before RNN layers are kept in float
+        targets = set(n for n, m in self.named_modules()
+                      if isinstance(m, (nn.LSTM, nn.GRU, nn.Linear)) and not n.startswith('conv.'))
+        return torch.quantization.quantize_dynamic(self, targets, dtype=torch.qint8)
+
     def reset_cache(self):
         self.hx_fwd = [None] * self.n_layers
         logger.debug('Reset cache.')
@@ -291,22 +335,26 @@ class RNNEncoder(EncoderBase):
                 xlens_sub2 (IntTensor): `[B]`
 
         """
+        # NOTE: cuDNN RNN kernels run on tensor cores in reduced precision on GPU,
+        # while only linear layers are autocast on CPU
+        with autocast(self.amp_dtype is not None, xs.get_device(), self.amp_dtype, xs.device.type):
+            eouts = self._forward(xs, xlens, task, use_cache, streaming, lookback, lookahead)
+        if self.amp_dtype is not None:
+            for v in eouts.values():
+                if v['xs'] is not None:
+                    v['xs'] = v['xs'].float()
+        return eouts
+
+    def _forward(self, xs, xlens, task, use_cache, streaming, lookback, lookahead):
         eouts = {'ys': {'xs': None, 'xlens': None},
                  'ys_sub1': {'xs': None, 'xlens': None},
                  'ys_sub2': {'xs': None, 'xlens': None}}
 
-        # Sort by lenghts in the descending order for pack_padded_sequence
-        if not self.lc_bidir:
-            xlens, perm_ids = torch.IntTensor(xlens).sort(0, descending=True)
-            xs = xs[perm_ids]
-            _, perm_ids_unsort = perm_ids.sort()
-
         # Dropout for inputs-hidden connection
         xs = self.dropout_in(xs)
 
-        bs, xmax, idim = xs.size()
-
         # Path through CNN blocks before RNN layers
+        # NOTE: CNN blocks do not depend on the order in the batch, so sort their (shorter) outputs
         if self.conv is not None:
             xs, xlens = self.conv(xs, xlens, lookback=lookback, lookahead=lookahead)
             if self.rnn_type in ['conv', 'tds', 'gated_conv']:
@@ -314,6 +362,16 @@ class RNNEncoder(EncoderBase):
                 eouts['ys']['xlens'] = xlens
                 return eouts
 
+        # Sort by lenghts in the descending order for pack_padded_sequence
+        perm_ids_unsort = None
+        if not self.lc_bidir:
+            xlens = torch.IntTensor(xlens)
+            # NOTE: skip gathering the whole batch when it is already sorted
+            if not (xlens[:-1] >= xlens[1:]).all():
+                xlens, perm_ids = xlens.sort(0, descending=True)
+                xs = xs[perm_ids]
+                _, perm_ids_unsort = perm_ids.sort()
+
         if not use_cache and not streaming:
             self.reset_cache()
 
@@ -325,13 +383,19 @@ class RNNEncoder(EncoderBase):
                 eouts[task]['xs'], eouts[task]['xlens'] = xs_sub1, xlens_sub1
                 return eouts
         else:
-            for lth in range(self.n_layers):
-                self.rnn[lth].flatten_parameters()  # for multi-GPUs
-                xs, state = self.padding(xs, xlens, self.rnn[lth],
-                                         prev_state=self.hx_fwd[lth],
+            # NOTE: keep outputs packed across layers unless subsampling needs padded inputs
+            if not streaming and self.subsample is None:
+                xs = pack_padded_sequence(xs, xlens.cpu().long(), batch_first=True)
+
+            for i, lth in enumerate(self.layer_ids):
+                flatten_parameters(self.rnn[i])  # for multi-GPUs
+                xs, state = self.padding(xs, xlens, self.rnn[i],
+                                         prev_state=self.hx_fwd[i],
                                          streaming=streaming)
-                self.hx_fwd[lth] = state
-                xs = self.dropout(xs)
+                # NOTE: keep the final states (and their graph) only when the next call reuses them
+                if use_cache or streaming:
+                    self.hx_fwd[i] = state
+                xs = apply_framewise(self.dropout, xs)
 
                 # Pick up outputs in the sub task before the projection layer
                 if lth == self.n_layers_sub1 - 1:
@@ -349,16 +413,19 @@ class RNNEncoder(EncoderBase):
                 if lth != self.n_layers - 1:
                     # Projection layer -> Subsampling
                     if self.proj is not None:
-                        xs = torch.tanh(self.proj[lth](xs))
+                        xs = apply_framewise(lambda x: torch.tanh(self.proj[lth](x)), xs)
                     if self.subsample is not None:
                         xs, xlens = self.subsample[lth](xs, xlens)
 
         # Bridge layer
+        # NOTE: apply before padding so that padded frames are skipped
         if self.bridge is not None:
-            xs = self.bridge(xs)
+            xs = apply_framewise(self.bridge, xs)
+        if isinstance(xs, PackedSequence):
+            xs = pad_packed_sequence(xs, batch_first=True)[0]
 
         # Unsort
-        if not self.lc_bidir:
+        if perm_ids_unsort is not None:
             xs = xs[perm_ids_unsort]
             xlens = xlens[perm_ids_unsort]
 
@@ -384,8 +451,8 @@ class RNNEncoder(EncoderBase):
         # full context BPTT
         if self.chunk_size_left < 0:
             for lth in range(self.n_layers):
-                self.rnn[lth].flatten_parameters()  # for multi-GPUs
-                self.rnn_bwd[lth].flatten_parameters()  # for multi-GPUs
+                flatten_parameters(self.rnn[lth])  # for multi-GPUs
+                flatten_parameters(self.rnn_bwd[lth])  # for multi-GPUs
                 # bwd
                 xs_bwd = torch.flip(xs, dims=[1])
                 xs_bwd, _ = self.rnn_bwd[lth](xs_bwd, hx=None)
@@ -425,8 +492,8 @@ class RNNEncoder(EncoderBase):
         for chunk_idx, t in enumerate(range(0, _N_l * n_chunks, _N_l)):
             xs_chunk = xs[:, t:t + (_N_l + _N_r)]
             for lth in range(self.n_layers):
-                self.rnn[lth].flatten_parameters()  # for multi-GPUs
-                self.rnn_bwd[lth].flatten_parameters()  # for multi-GPUs
+                flatten_parameters(self.rnn[lth])  # for multi-GPUs
+                flatten_parameters(self.rnn_bwd[lth])  # for multi-GPUs
                 # bwd
                 xs_chunk_bwd = torch.flip(xs_chunk, dims=[1])
                 xs_chunk_bwd, _ = self.rnn_bwd[lth](xs_chunk_bwd, hx=None)
@@ -475,17 +542,30 @@ class RNNEncoder(EncoderBase):
 
     def sub_module(self, xs, xlens, perm_ids_unsort, module='sub1'):
         if self.task_specific_layer:
-            getattr(self, 'rnn_' + module).flatten_parameters()  # for multi-GPUs
+            flatten_parameters(getattr(self, 'rnn_' + module))  # for multi-GPUs
             xs_sub, _ = self.padding(xs, xlens, getattr(self, 'rnn_' + module))
-            xs_sub = self.dropout(xs_sub)
+            xs_sub = apply_framewise(self.dropout, xs_sub)
         else:
-            xs_sub = xs.clone()[perm_ids_unsort]
+            xs_sub = xs
         if getattr(self, 'bridge_' + module) is not None:
-            xs_sub = getattr(self, 'bridge_' + module)(xs_sub)
-        xlens_sub = xlens[perm_ids_unsort]
+            xs_sub = apply_framewise(getattr(self, 'bridge_' + module), xs_sub)
+        if isinstance(xs_sub, PackedSequence):
+            xs_sub = pad_packed_sequence(xs_sub, batch_first=True)[0]
+        elif xs_sub is xs:
+            xs_sub = xs.clone()
+        xlens_sub = xlens
+        if perm_ids_unsort is not None:
+            xs_sub = xs_sub[perm_ids_unsort]
+            xlens_sub = xlens[perm_ids_unsort]
         return xs_sub, xlens_sub
 
 
+def flatten_parameters(rnn):
+    # NOTE: dynamically quantized RNNs have no cuDNN weight buffer to compact
+    if hasattr(rnn, 'flatten_parameters'):
+        rnn.flatten_parameters()
+
+
 class Padding(nn.Module):
     """Padding variable length of sequences."""
 
@@ -494,8 +574,12 @@ class Padding(nn.Module):
         self.bidir_sum = bidir_sum_fwd_bwd
 
     def forward(self, xs, xlens, rnn, prev_state=None, streaming=False):
-        if not streaming and xlens is not None:
-            xs = pack_padded_sequence(xs, xlens.tolist(), batch_first=True)
+        if isinstance(xs, PackedSequence):
+            # NOTE: outputs are kept packed for the next layer
+            xs, state = rnn(xs, hx=prev_state)
+        elif not streaming and xlens is not None:
+            # NOTE: pass lengths as a CPU LongTensor as is instead of round-tripping through a list
+            xs = pack_padded_sequence(xs, xlens.cpu().long(), batch_first=True)
             xs, state = rnn(xs, hx=prev_state)
             xs = pad_packed_sequence(xs, batch_first=True)[0]
         else:
@@ -503,11 +587,27 @@ class Padding(nn.Module):
 
         if self.bidir_sum:
             assert rnn.bidirectional
-            half = xs.size(-1) // 2
-            xs = xs[:, :, :half] + xs[:, :, half:]
+            half = rnn.hidden_size
+            xs = apply_framewise(lambda x: x[..., :half] + x[..., half:], xs)
         return xs, state
 
 
+def apply_framewise(fn, xs):
+    """Apply a frame-wise function to padded or packed sequences.
+
+    Args:
+        fn (callable): function applied to each frame independently
+        xs (FloatTensor or PackedSequence): `[B, T, dim]`
+    Returns:
+        xs (FloatTensor or PackedSequence): `[B, T, dim']`
+
+    """
+    if isinstance(xs, PackedSequence):
+        # NOTE: PackedSequence.data is already a 2D tensor of size `[sum(T_i), dim]`
+        return xs._replace(data=fn(xs.data))
+    return fn(xs)
+
+
 class MaxpoolSubsampler(nn.Module):
     """Subsample by max-pooling input frames."""
 
@@ -525,7 +625,7 @@ class MaxpoolSubsampler(nn.Module):
         if self.factor == 1:
             return xs, xlens
 
-        xs = self.pool(xs.transpose(2, 1)).transpose(2, 1).contiguous()
+        xs = self.pool(xs.transpose(2, 1)).transpose(2, 1)
 
         xlens = update_lens_1d(xlens, self.pool)
         return xs, xlens
@@ -555,7 +655,7 @@ class Conv1dSubsampler(nn.Module):
             return xs, xlens
 
         xs = torch.relu(self.conv1d(xs.transpose(2, 1)))
-        xs = self.pool(xs).transpose(2, 1).contiguous()
+        xs = self.pool(xs).transpose(2, 1)
 
         xlens = update_lens_1d(xlens, self.pool)
         return xs, xlens
@@ -575,8 +675,7 @@ class DropSubsampler(nn.Module):
 
         xs = xs[:, ::self.factor, :]
 
-        xlens = [max(1, math.floor(i // self.factor)) for i in xlens]
-        xlens = torch.IntTensor(xlens)
+        xlens = (torch.IntTensor(xlens) // self.factor).clamp(min=1)
         return xs, xlens
 
 
@@ -594,15 +693,13 @@ class ConcatSubsampler(nn.Module):
         if self.factor == 1:
             return xs, xlens
 
-        xs = xs.transpose(1, 0).contiguous()
-        xs = [torch.cat([xs[t - r:t - r + 1] for r in range(self.factor - 1, -1, -1)], dim=-1)
-              for t in range(xs.size(0)) if (t + 1) % self.factor == 0]
-        xs = torch.cat(xs, dim=0).transpose(1, 0)
+        # Concatenate every `factor` successive frames along the feature dimension
         # NOTE: Exclude the last frames if the length is not divisible
+        bs, xmax, idim = xs.size()
+        xs = xs[:, :xmax - xmax % self.factor].reshape(bs, xmax // self.factor, idim * self.factor)
         xs = torch.relu(self.proj(xs))
 
-        xlens = [max(1, math.floor(i // self.factor)) for i in xlens]
-        xlens = torch.IntTensor(xlens)
+        xlens = (torch.IntTensor(xlens) // self.factor).clamp(min=1)
         return xs, xlens
 
 
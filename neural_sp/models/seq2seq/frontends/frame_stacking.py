@@ -35,37 +35,11 @@ def stack_frame(feat, n_stacks, n_skips, dtype=np.float32):
     T, input_dim = feat.shape
     T_new = T // n_skips if T % n_stacks == 0 else (T // n_skips) + 1
 
-    stacked_feat = np.zeros((T_new, input_dim * n_stacks), dtype=dtype)
-    stack_count = 0
-    stack = []
-    for t, frame_t in enumerate(feat):
-        if t == len(feat) - 1:  # final frame
-            # Stack the final frame
-            stack.append(frame_t)
-
-            while stack_count != int(T_new):
-                # Concatenate stacked frames
-                for i in range(len(stack)):
-                    stacked_feat[stack_count][input_dim * i:input_dim * (i + 1)] = stack[i]
-                stack_count += 1
-
-                # Delete some frames to skip
-                for _ in range(n_skips):
-                    if len(stack) != 0:
-                        stack.pop(0)
-
-        elif len(stack) < n_stacks:  # first & middle frames
-            # Stack some frames until stack is filled
-            stack.append(frame_t)
-
-        if len(stack) == n_stacks:
-            # Concatenate stacked frames
-            for i in range(n_stacks):
-                stacked_feat[stack_count][input_dim * i:input_dim * (i + 1)] = stack[i]
-            stack_count += 1
-
-            # Delete some frames to skip
-            for _ in range(n_skips):
-                stack.pop(0)
+    # NOTE: the i-th output frame concatenates input frames [i * n_skips, i * n_skips + n_stacks).
+    # Frames beyond the end are filled with zeros.
+    frame_ids = np.arange(T_new)[:, None] * n_skips + np.arange(n_stacks)[None, :]
+    frame_ids = np.minimum(frame_ids, T)
+    feat_pad = np.concatenate([feat, np.zeros((1, input_dim), dtype=feat.dtype)], axis=0)
+    stacked_feat = feat_pad[frame_ids].reshape((T_new, input_dim * n_stacks)).astype(dtype)
 
     return stacked_feat
@@ -6,12 +6,9 @@
 
 """Add Gaussian noise to input features."""
 
-import torch
-
 
 def add_gaussian_noise(xs):
-    noise = torch.normal(torch.zeros(xs.shape[-1]), 0.075)
-    if xs.is_cuda:
-        noise = noise.cuda()
+    # NOTE: sample on the same device as inputs instead of copying from CPU
+    noise = xs.new_zeros(xs.shape[-1]).normal_(0, 0.075)
     xs.data += noise
     return xs
@@ -34,31 +34,26 @@ def splice(feat, n_splices=1, n_stacks=1, dtype=np.float32):
 
     max_xlen, input_dim = feat.shape
     freq = (input_dim // 3) // n_stacks
-    feat_splice = np.zeros((max_xlen, freq * (n_splices * n_stacks) * 3), dtype=dtype)
-
-    for i_time in range(max_xlen):
-        spliced_frames = np.zeros((n_splices * n_stacks, freq, 3))
-        for i_splice in range(0, n_splices, 1):
-            if i_time <= n_splices - 1 and i_splice < n_splices - i_time:
-                # copy the first frame to left side (padding left frames)
-                copy_frame = feat[0]
-            elif max_xlen - n_splices <= i_time and i_time + (i_splice - n_splices) > max_xlen - 1:
-                # copy the last frame to right side (padding right frames)
-                copy_frame = feat[-1]
-            else:
-                copy_frame = feat[i_time + (i_splice - n_splices)]
-
-            # `[freq * 3 * n_stacks]` -> `[freq, 3, n_stacks]`
-            copy_frame = copy_frame.reshape((freq, 3, n_stacks))
-
-            # `[freq, 3, n_stacks]` -> `[n_stacks, freq, 3]`
-            copy_frame = np.transpose(copy_frame, (2, 0, 1))
-
-            spliced_frames[i_splice: i_splice + n_stacks] = copy_frame
-
-        # `[n_splices * n_stacks, freq, 3] -> `[freq, n_splices * n_stacks, 3]`
-        spliced_frames = np.transpose(spliced_frames, (1, 0, 2))
-
-        feat_splice[i_time] = spliced_frames.reshape((freq * (n_splices * n_stacks) * 3))
+    n_rows = n_splices * n_stacks
+
+    # `[T, freq * 3 * n_stacks]` -> `[T, n_stacks, freq, 3]`
+    frames = feat.reshape((max_xlen, freq, 3, n_stacks)).transpose((0, 3, 1, 2))
+
+    # NOTE: row r of each spliced frame is the stack (r - s) of frame t + s - n_splices,
+    # where s = min(r, n_splices - 1) (left frames are padded with the first frame).
+    # Rows beyond n_splices + n_stacks - 1 are left as zeros.
+    rows = np.arange(n_rows)
+    splice_ids = np.minimum(rows, n_splices - 1)
+    stack_ids = rows - splice_ids
+    valid = stack_ids < n_stacks
+    time_ids = np.arange(max_xlen)[:, None] + splice_ids[None, valid] - n_splices
+    time_ids = np.clip(time_ids, 0, max(max_xlen - 1, 0))
+
+    spliced_frames = np.zeros((max_xlen, n_rows, freq, 3), dtype=dtype)
+    spliced_frames[:, valid] = frames[time_ids, stack_ids[None, valid]]
+
+    # `[T, n_splices * n_stacks, freq, 3] -> `[T, freq, n_splices * n_stacks, 3]`
+    spliced_frames = spliced_frames.transpose((0, 2, 1, 3))
+    feat_splice = spliced_frames.reshape((max_xlen, freq * n_rows * 3))
 
     return feat_splice
@@ -25,7 +25,10 @@ from neural_sp.models.seq2seq.frontends.gaussian_noise import add_gaussian_noise
 from neural_sp.models.seq2seq.frontends.sequence_summary import SequenceSummaryNetwork
 from neural_sp.models.seq2seq.frontends.spec_augment import SpecAugment
 from neural_sp.models.seq2seq.frontends.splicing import splice
+from neural_sp.models.torch_utils import autocast
+from neural_sp.models.torch_utils import inference_mode
 from neural_sp.models.torch_utils import np2tensor
+from neural_sp.models.torch_utils import np2tensor_padded
 from neural_sp.models.torch_utils import tensor2np
 from neural_sp.models.torch_utils import pad_list
 
@@ -266,13 +269,16 @@ class Speech2Text(ModelBase):
         # for the forward decoder in the main task
         if (self.fwd_weight > 0 or (self.bwd_weight == 0 and self.ctc_weight > 0) or self.mbr_training) and task in ['all', 'ys', 'ys.ctc', 'ys.mbr']:
             teacher_logits = None
+            # NOTE: teachers are frozen, so do not build their graphs
             if teacher is not None:
                 teacher.eval()
-                teacher_logits = teacher.generate_logits(batch)
+                with torch.no_grad():
+                    teacher_logits = teacher.generate_logits(batch)
                 # TODO(hirofumi): label smoothing, scheduled sampling, dropout?
             elif teacher_lm is not None:
                 teacher_lm.eval()
-                teacher_logits = self.generate_lm_logits(batch['ys'], lm=teacher_lm)
+                with torch.no_grad():
+                    teacher_logits = self.generate_lm_logits(batch['ys'], lm=teacher_lm)
 
             loss_fwd, obs_fwd = self.dec_fwd(eout_dict['ys']['xs'], eout_dict['ys']['xlens'],
                                              batch['ys'], task,
@@ -366,7 +372,7 @@ class Speech2Text(ModelBase):
                 xs = [splice(x, self.n_splices, self.n_stacks) for x in xs]
             xlens = torch.IntTensor([len(x) for x in xs])
 
-            xs = pad_list([np2tensor(x, self.device_id).float() for x in xs], 0.)
+            xs = np2tensor_padded(xs, 0., self.device_id)
 
             # SpecAugment
             if self.specaug is not None and self.training:
@@ -401,7 +407,7 @@ class Speech2Text(ModelBase):
 
     def get_ctc_probs(self, xs, task='ys', temperature=1, topk=None):
         self.eval()
-        with torch.no_grad():
+        with inference_mode():
             eout_dict = self.encode(xs, task)
             dir = 'fwd' if self.fwd_weight >= self.bwd_weight else 'bwd'
             if task == 'ys_sub1':
@@ -451,6 +457,7 @@ class Speech2Text(ModelBase):
         is_reset = True   # for the first chunk
 
         self.eval()
+        # NOTE: encoder states cached across chunks must remain usable in training
         with torch.no_grad():
             lm = getattr(self, 'lm_fwd', None)
             lm_second = getattr(self, 'lm_second', None)
@@ -602,6 +609,7 @@ class Speech2Text(ModelBase):
                 lm_weight (float): the weight of RNNLM score
                 resolving_unk (bool): not used (to make compatible)
                 fwd_bwd_attention (bool):
+                amp (bool): mixed-precision inference on GPU
             idx2token (): converter from index to token
             exclude_eos (bool): exclude <eos> from best_hyps_id
             refs_id (list): gold token IDs to compute log likelihood
@@ -630,7 +638,9 @@ class Speech2Text(ModelBase):
             self.utt_id_prev = utt_ids[0]
 
         self.eval()
-        with torch.no_grad():
+        # NOTE: do not use inference_mode here since decoder states (e.g., dstate_prev in
+        # discourse-aware decoding) are carried over to the next training step
+        with torch.no_grad(), autocast(params.get('recog_amp', False), self.device_id):
             # Encode input features
             if self.input_type == 'speech' and self.mtl_per_batch and 'bwd' in dir:
                 eout_dict = self.encode(xs, task)
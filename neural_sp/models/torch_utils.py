@@ -6,6 +6,7 @@
 
 """Utility functions."""
 
+import contextlib
 import copy
 import numpy as np
 import torch
@@ -24,9 +25,63 @@ def tensor2np(x):
         np.ndarray
 
     """
+    if x.dtype == getattr(torch, 'bfloat16', None):
+        x = x.float()  # NOTE: numpy does not support bfloat16
     return x.cpu().numpy()
 
 
+def tensors2np(xs):
+    """Convert a list of torch.Tensor to np.ndarray with a single device-to-host copy.
+
+    Args:
+        xs (list): A list of length `[B]`, which contains Tensors of arbitrary shapes
+    Returns:
+        list: A list of length `[B]`, which contains np.ndarray views
+
+    """
+    if len(xs) == 0:
+        return []
+    flat = tensor2np(torch.cat([x.reshape(-1) for x in xs], dim=0))
+    offsets = np.cumsum([x.numel() for x in xs])[:-1]
+    return [x_flat.reshape(x.size()) for x_flat, x in zip(np.split(flat, offsets), xs)]
+
+
+def inference_mode():
+    """Context for inference without autograd bookkeeping.
+
+    NOTE: torch.inference_mode (PyTorch>=1.9) also skips version counters and
+    view tracking. Fall back to torch.no_grad for older versions.
+
+    Returns:
+        context manager
+
+    """
+    if hasattr(torch, 'inference_mode'):
+        return torch.inference_mode()
+    return torch.no_grad()
+
+
+def autocast(enabled=True, device_id=-1, dtype=None, device_type='cuda'):
+    """Context for mixed-precision (bf16/fp16) computation.
+
+    Args:
+        enabled (bool): if False, return a no-op context
+        device_id (int): the index of the device
+        dtype (torch.dtype): bf16 or fp16 (None: bf16 if supported)
+        device_type (str): cuda or cpu
+    Returns:
+        context manager
+
+    """
+    if not enabled or not hasattr(torch, 'autocast'):
+        return contextlib.ExitStack()
+    if device_type == 'cuda' and device_id < 0:
+        return contextlib.ExitStack()
+    if dtype is None:
+        dtype = torch.bfloat16 if device_type == 'cpu' or torch.cuda.is_bf16_supported() else torch.float16
+    return torch.autocast(device_type, dtype=dtype)
+
+
 def np2tensor(array, device_id=-1):
     """Convert form np.ndarray to torch.Tensor.
 
@@ -43,6 +98,28 @@ def np2tensor(array, device_id=-1):
     return tensor
 
 
+def np2tensor_padded(xs, pad_value=0., device_id=-1):
+    """Pad a list of np.ndarray on CPU and transfer them to the device with a single copy.
+
+    Args:
+        xs (list): A list of length `[B]`, which contains arrays of size `[T, input_size]`
+        pad_value (float):
+        device_id (int): the index of the device
+    Returns:
+        xs_pad (FloatTensor): `[B, T, input_size]`
+
+    """
+    max_time = max(x.shape[0] for x in xs)
+    # NOTE: page-locked memory enables an asynchronous host-to-device copy
+    pin_memory = device_id >= 0 and torch.cuda.is_available()
+    xs_pad = torch.empty((len(xs), max_time) + xs[0].shape[1:], pin_memory=pin_memory).fill_(pad_value)
+    for b, x in enumerate(xs):
+        xs_pad[b, :x.shape[0]] = torch.from_numpy(x)
+    if device_id >= 0:
+        xs_pad = xs_pad.cuda(device_id, non_blocking=True)
+    return xs_pad
+
+
 def pad_list(xs, pad_value=0., pad_left=False):
     """Convert list of Tensors to a single Tensor with padding.
 
@@ -42,6 +42,7 @@ def make_args(**kwargs):
         param_init=0.1,
         chunk_size_left=-1,
         chunk_size_right=-1,
+        amp_dtype=None,
     )
     args.update(kwargs)
     return args
@@ -168,3 +169,80 @@ def test_forward(args):
                 else:
                     assert enc_out_dict['ys_sub2']['xlens'][b].item() == math.floor(
                         xlens[b].item() / enc.subsampling_factor)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ({'rnn_type': 'blstm', 'last_proj_dim': 128}),
+        ({'rnn_type': 'lstm', 'n_projs': 64, 'last_proj_dim': 256}),
+        ({'rnn_type': 'blstm', 'n_layers_sub1': 4, 'last_proj_dim': 128}),
+        ({'rnn_type': 'blstm', 'subsample': "1_2_2_1_1", 'n_projs': 64, 'last_proj_dim': 128}),
+    ]
+)
+def test_forward_amp(args):
+    args = make_args(amp_dtype='bfloat16', **args)
+
+    batch_size = 4
+    xmax = 40
+    device_id = -1
+    module = importlib.import_module('neural_sp.models.seq2seq.encoders.rnn')
+    enc = module.RNNEncoder(**args)
+    enc.eval()
+
+    # check that the bridge layer is actually computed in bf16
+    dtypes = []
+    enc.bridge.register_forward_hook(lambda m, i, o: dtypes.append(o.dtype))
+
+    xs = np.random.randn(batch_size, xmax, args['input_dim']).astype(np.float32)
+    xlens = torch.IntTensor([len(x) - i * enc.subsampling_factor for i, x in enumerate(xs)])
+    xs = pad_list([np2tensor(x, device_id).float() for x in xs], 0.)
+    with torch.no_grad():
+        enc_out_dict = enc(xs, xlens, task='all')
+        enc.amp_dtype = None
+        enc_out_dict_fp32 = enc(xs, xlens, task='all')
+    assert dtypes == [torch.bfloat16, torch.float32]
+
+    for task in ['ys', 'ys_sub1']:
+        if enc_out_dict[task]['xs'] is None:
+            continue
+        assert enc_out_dict[task]['xs'].dtype == torch.float32
+        assert enc_out_dict[task]['xs'].size() == enc_out_dict_fp32[task]['xs'].size()
+        assert torch.equal(enc_out_dict[task]['xlens'], enc_out_dict_fp32[task]['xlens'])
+        assert torch.allclose(enc_out_dict[task]['xs'], enc_out_dict_fp32[task]['xs'], atol=5e-2)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ({'rnn_type': 'blstm'}),
+        ({'rnn_type': 'bgru'}),
+        ({'rnn_type': 'lstm', 'n_projs': 64}),
+        ({'rnn_type': 'blstm', 'n_layers_sub1': 4, 'n_layers_sub2': 3}),
+        ({'rnn_type': 'blstm', 'chunk_size_left': 40, 'chunk_size_right': 40}),
+    ]
+)
+def test_optimize_for_inference(args):
+    args = make_args(**args)
+
+    batch_size = 4
+    xmax = 40 if args['chunk_size_left'] == -1 else 800
+    device_id = -1
+    module = importlib.import_module('neural_sp.models.seq2seq.encoders.rnn')
+    enc = module.RNNEncoder(**args)
+    enc.eval()
+    enc_q = enc.optimize_for_inference()
+
+    xs = np.random.randn(batch_size, xmax, args['input_dim']).astype(np.float32)
+    xlens = torch.IntTensor([len(x) - i for i, x in enumerate(xs)])
+    xs = pad_list([np2tensor(x, device_id).float() for x in xs], 0.)
+    with torch.no_grad():
+        enc_out_dict = enc(xs, xlens, task='all')
+        enc_out_dict_q = enc_q(xs, xlens, task='all')
+
+    for task in ['ys', 'ys_sub1', 'ys_sub2']:
+        if enc_out_dict[task]['xs'] is None:
+            continue
+        assert enc_out_dict_q[task]['xs'].size() == enc_out_dict[task]['xs'].size()
+        assert torch.equal(enc_out_dict_q[task]['xlens'], enc_out_dict[task]['xlens'])
+        assert torch.allclose(enc_out_dict_q[task]['xs'], enc_out_dict[task]['xs'], atol=5e-2)
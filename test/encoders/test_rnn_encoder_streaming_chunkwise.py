@@ -42,6 +42,7 @@ def make_args(**kwargs):
         param_init=0.1,
         chunk_size_left=-1,
         chunk_size_right=-1,
+        amp_dtype=None,
     )
     args.update(kwargs)
     return args
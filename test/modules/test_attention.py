@@ -34,6 +34,7 @@ def make_args(**kwargs):
         ({'atype': 'luong_dot'}),
         ({'atype': 'luong_general'}),
         ({'atype': 'luong_concat'}),
+        ({'atype': 'luong_concat', 'qdim': 24}),
         # others
         ({'sharpening_factor': 2.0}),
         ({'sigmoid_smoothing': True}),
@@ -62,3 +63,38 @@ def test_forward(args):
         cv, aws, _, _ = out
         assert cv.size() == (batch_size, 1, value.size(2))
         assert aws.size() == (batch_size, 1, 1, klen)
+
+
+def test_triggered_attention_legacy_checkpoint():
+    args = make_args(atype='triggered_attention', adim=32, dropout=0.)
+
+    batch_size = 4
+    klen = 40
+    key = torch.randn(batch_size, klen, args['kdim'])
+    query = torch.randn(batch_size, 1, args['qdim'])
+    trigger_point = torch.IntTensor([klen - 1] * batch_size)
+
+    module = importlib.import_module('neural_sp.models.modules.attention')
+    attention = module.AttentionMechanism(**args)
+    state_dict = attention.state_dict()
+
+    # checkpoints saved before version 2 do not project keys
+    attention_legacy = module.AttentionMechanism(**args)
+    state_dict_legacy = attention.state_dict()
+    del state_dict_legacy._metadata['']['version']
+    attention_legacy.load_state_dict(state_dict_legacy)
+    assert not attention_legacy.project_key
+
+    attention_new = module.AttentionMechanism(**args)
+    attention_new.load_state_dict(state_dict)
+    assert attention_new.project_key
+
+    with torch.no_grad():
+        aws = attention_legacy(key, key, query, trigger_point=trigger_point)[1]
+        aws_new = attention_new(key, key, query, trigger_point=trigger_point)[1]
+        attention_new.w_key.weight.copy_(torch.eye(args['kdim']))
+        attention_new.w_key.bias.zero_()
+        attention_new.reset()
+        aws_identity = attention_new(key, key, query, trigger_point=trigger_point)[1]
+    assert not torch.allclose(aws, aws_new)
+    assert torch.allclose(aws, aws_identity)
@@ -57,3 +57,32 @@ def test_forward(args):
         cv, aws, _, _ = out
         assert cv.size() == (batch_size, 1, value.size(2))
         assert aws.size() == (batch_size, args['n_heads'], 1, klen)
+
+
+@pytest.mark.parametrize(
+    "args", [
+        ({'n_heads': 1}),
+        ({'n_heads': 4}),
+        ({'bias': False}),
+    ]
+)
+def test_forward_without_weights(args):
+    args = make_args(**args)
+
+    batch_size = 4
+    klen = 40
+    qlen = 5
+    key = torch.randn(batch_size, klen, args['kdim'])
+    query = torch.randn(batch_size, qlen, args['qdim'])
+    mask = torch.ones(batch_size, qlen, klen).byte()
+    mask[0, :, 30:] = 0
+
+    module = importlib.import_module('neural_sp.models.modules.multihead_attention')
+    attention = module.MultiheadAttentionMechanism(**args)
+    attention.eval()
+    cv_ref, aws, _, _ = attention(key, key, query, mask=mask)
+    cv, aws_none, _, _ = attention(key, key, query, mask=mask, need_weights=False)
+    assert cv.size() == cv_ref.size()
+    assert torch.allclose(cv, cv_ref, atol=1e-5)
+    if hasattr(torch.nn.functional, 'scaled_dot_product_attention'):
+        assert aws_none is None